@@ -0,0 +1,244 @@
+## Benchmarks for the Bifrost relay hot paths, kept per commit so regressions show up before production
+##   python bench_bifrost.py                       (run everything, append to bench_history.jsonl, compare with the last other commit)
+##   python bench_bifrost.py --only decode_json,encode_json --compare 1a2b3c4 --fail
+
+import argparse
+import asyncio
+import base64
+import copy
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+
+import numpy as np
+
+# genai.Client refuses to start without a key; nothing here reaches the real API
+os.environ.setdefault("GOOGLE_API_KEY", "bench-bifrost")
+import main
+import ragnarok
+
+BENCH_SECONDS = 1.0  # how long each micro-benchmark runs
+BENCH_ALLOC_SAMPLES = 200  # calls traced for allocation figures
+BENCH_MAX_REGRESSION = 0.10  # fractional drop in messages/sec, or rise in end-to-end p99 latency, reported as a regression
+BENCH_HISTORY = "bench_history.jsonl"
+
+def media_samples():
+    """Media shaped like real traffic: 3 s of browser PCM, a camera JPEG and a 200 ms model audio chunk."""
+    pcm = (np.random.default_rng(1).normal(0, 3000, main.GJALLARHORN_SAMPLE_RATE * 3)).astype("<i2").tobytes()
+    _, jpeg = ragnarok.sample_media()
+    reply_audio = np.zeros(int(24000 * 0.2), dtype="<i2").tobytes()
+    return pcm, jpeg, reply_audio
+
+def allocation_profile(operation, messages_per_call=1):
+    """Peak bytes allocated during one message and blocks still held after it, averaged over samples.
+
+    CPython has no per-call allocation counter, so tracemalloc's peak and retained figures stand in.
+    """
+    tracemalloc.start()
+    peak_total = 0
+    retained_before = tracemalloc.get_traced_memory()[0]
+    kept = []
+    for _ in range(BENCH_ALLOC_SAMPLES):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        kept.append(operation())
+        peak_total += tracemalloc.get_traced_memory()[1] - current
+    retained_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    retained_after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    messages = BENCH_ALLOC_SAMPLES * messages_per_call
+    return {
+        "alloc_peak_bytes_per_message": round(peak_total / messages),
+        "retained_bytes_per_message": round((retained_after - retained_before) / messages),
+        "retained_blocks_per_message": round(retained_blocks / messages, 2),
+    }
+
+def measure(operation, message_bytes, seconds=BENCH_SECONDS, messages_per_call=1):
+    """Calls `operation` repeatedly for `seconds` and reports its rate and allocation profile."""
+    for _ in range(50):
+        operation()
+    calls = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(20):
+            operation()
+        calls += 20
+    elapsed = time.perf_counter() - started
+    result = {
+        "messages_per_second": round(calls * messages_per_call / elapsed, 1),
+        "bytes_per_second": round(calls * messages_per_call * message_bytes / elapsed),
+    }
+    result.update(allocation_profile(operation, messages_per_call))
+    return result
+
+def bench_decode_json():
+    """odin_to_yggdrasil per message, JSON mode: json.loads, dict walk and base64 decode of audio plus frame."""
+    pcm, jpeg, _ = media_samples()
+    message = json.dumps({"realtime_input": {"media_chunks": [
+        {"mime_type": "audio/pcm", "data": base64.b64encode(pcm).decode("ascii")},
+        {"mime_type": "image/jpeg", "data": base64.b64encode(jpeg).decode("ascii")},
+    ]}})
+    return measure(lambda: main.read_heimdall_message(message), len(message))
+
+def bench_decode_binary():
+    """odin_to_yggdrasil per message, binary mode: header check and payload slice."""
+    pcm, _, _ = media_samples()
+    frame = main.forge_bifrost_frame("audio/pcm", pcm)
+    return measure(lambda: main.read_heimdall_message(frame), len(frame))
+
+def bench_encode_json():
+    """yggdrasil_to_odin per audio chunk, JSON mode: base64 encode and json.dumps."""
+    _, _, reply_audio = media_samples()
+    return measure(lambda: main.heimdall_envelope("audio/pcm", reply_audio, False), len(reply_audio))
+
+def bench_encode_binary():
+    """yggdrasil_to_odin per audio chunk, binary mode: header plus payload."""
+    _, _, reply_audio = media_samples()
+    return measure(lambda: main.heimdall_envelope("audio/pcm", reply_audio, True), len(reply_audio))
+
+def bench_tool_dispatch():
+    """A one-call tool call through MjolnirExecutor with the result cache bypassed, so the thread pool runs."""
+    uncached_tools = {name: copy.copy(tool) for name, tool in main.mjolnir_tools.items()}
+    for tool in uncached_tools.values():
+        tool.cache_ttl = None
+    executor = main.MjolnirExecutor(uncached_tools)
+    invocation = types.SimpleNamespace(name="wield_mjolnir", args={"luminosity": 40, "aura_hue": "warm"}, id="bench")
+    loop = asyncio.new_event_loop()
+
+    async def dispatch_batch(count):
+        for _ in range(count):
+            await executor.execute([invocation])
+
+    try:
+        return measure(lambda: loop.run_until_complete(dispatch_batch(10)), 0, messages_per_call=10)
+    finally:
+        loop.close()
+
+def bench_tool_cached():
+    """The same tool call answered from the executor's result cache."""
+    executor = main.MjolnirExecutor(main.mjolnir_tools)
+    invocation = types.SimpleNamespace(name="wield_mjolnir", args={"luminosity": 40, "aura_hue": "warm"}, id="bench")
+    loop = asyncio.new_event_loop()
+
+    async def dispatch_batch(count):
+        for _ in range(count):
+            await executor.execute([invocation])
+
+    try:
+        return measure(lambda: loop.run_until_complete(dispatch_batch(10)), 0, messages_per_call=10)
+    finally:
+        loop.close()
+
+def bench_end_to_end(binary=False):
+    """Whole sessions through bifrost_handler against the replay upstream, via ragnarok's load generator."""
+    load_args = argparse.Namespace(clients=20, duration=5.0, interval=0.25, ramp=0.5, binary=binary,
+                                   trace=None, url=None, max_sessions=None)
+    report = asyncio.run(ragnarok.run_load(load_args))
+    return {
+        "messages_per_second": round(report["sent_per_second"] + report["received_per_second"], 1),
+        "bytes_per_second": round(report["sent_bytes_per_second"] + report["received_bytes_per_second"]),
+        "latency_p50": report["latency_p50"],
+        "latency_p99": report["latency_p99"],
+        "failures": report["failures"],
+    }
+
+BENCHMARKS = {
+    "decode_json": bench_decode_json,
+    "decode_binary": bench_decode_binary,
+    "encode_json": bench_encode_json,
+    "encode_binary": bench_encode_binary,
+    "tool_dispatch": bench_tool_dispatch,
+    "tool_cached": bench_tool_cached,
+    "end_to_end_json": bench_end_to_end,
+    "end_to_end_binary": lambda: bench_end_to_end(binary=True),
+}
+
+def current_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+def read_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as history_file:
+        return [json.loads(line) for line in history_file if line.strip()]
+
+def pick_baseline(history, commit, compare):
+    """The newest run of `compare` if given, otherwise the newest run of any other commit."""
+    for entry in reversed(history):
+        if compare is not None and entry["commit"].startswith(compare):
+            return entry
+        if compare is None and entry["commit"] != commit:
+            return entry
+    return None
+
+def compare_runs(results, baseline, max_regression):
+    """Prints a side-by-side table and returns the benchmarks that worsened by more than `max_regression`.
+
+    Micro-benchmarks are judged on messages/sec. End-to-end runs are paced by the load generator, so their
+    rate stays put when the relay slows down; they are judged on p99 latency, where higher is worse.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<20}{'metric':>22}{'value':>14}{'baseline':>14}{'change':>10}")
+    for name, result in results.items():
+        metric = "latency_p99" if "latency_p99" in result else "messages_per_second"
+        previous = baseline["results"].get(name) if baseline else None
+        if not previous or not previous.get(metric):
+            print(f"{name:<20}{metric:>22}{result[metric]:>14}{'-':>14}{'':>10}")
+            continue
+        change = result[metric] / previous[metric] - 1
+        worse = change > max_regression if metric == "latency_p99" else change < -max_regression
+        flag = "  REGRESSION" if worse else ""
+        print(f"{name:<20}{metric:>22}{result[metric]:>14}{previous[metric]:>14}{change:>+10.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Bifrost relay hot paths and track results per commit")
+    parser.add_argument("--only", help="comma-separated benchmarks to run: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--history", default=BENCH_HISTORY, help="JSONL file results are appended to")
+    parser.add_argument("--compare", help="commit (prefix) to compare against; default is the newest other commit")
+    parser.add_argument("--max-regression", type=float, default=BENCH_MAX_REGRESSION)
+    parser.add_argument("--fail", action="store_true", help="exit non-zero when a regression is found")
+    parser.add_argument("--no-save", action="store_true", help="do not append this run to the history")
+    args = parser.parse_args()
+
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    results = {}
+    for name in selected:
+        results[name] = BENCHMARKS[name]()
+        print(f"{name}: {json.dumps(results[name])}")
+
+    commit, dirty = current_commit()
+    history = read_history(args.history)
+    baseline = pick_baseline(history, commit, args.compare)
+    if baseline:
+        print(f"\nComparing with {baseline['commit']} ({baseline['recorded_at']})")
+    regressions = compare_runs(results, baseline, args.max_regression)
+
+    if not args.no_save:
+        entry = {
+            "commit": commit,
+            "dirty": dirty,
+            "recorded_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(args.history, "a", encoding="utf-8") as history_file:
+            history_file.write(json.dumps(entry) + "\n")
+
+    if regressions and args.fail:
+        raise SystemExit(f"Regressions: {', '.join(regressions)}")
@@ -1,53 +1,1074 @@
-## pip install google-genai==0.3.0
+## pip install google-genai==0.3.0 numpy pillow
+## optional, for faster JSON: pip install orjson (or msgspec)
 
+import argparse
 import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import copy
+import contextvars
+import functools
+import http
+import inspect
 import json
+import logging
+import logging.handlers
+import multiprocessing
 import os
+import queue
+import random
+import secrets
+import signal
+import socket
+import struct
+import time
+import typing
+import uuid
 import websockets
 from google import genai
 import base64
+import io
+import numpy as np
+from PIL import Image
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON for Bifrost messages
+    orjson = None
+try:
+    import msgspec
+except ImportError:  # optional: typed decoding of Heimdall messages
+    msgspec = None
 
 # Load API key from the environment
-os.environ['GOOGLE_API_KEY'] = ''
+os.environ.setdefault('GOOGLE_API_KEY', '')
 YGGDRASIL_MODEL = "gemini-2.0-flash-exp"  # Use your model ID
 
+BIFROST_HOST = "localhost"
+BIFROST_PORT = 6106
+# On shutdown, how long open sessions may keep running after the listener closes
+BIFROST_DRAIN_SECONDS = 30.0
+# How often each worker process reports its health to the launcher
+BIFROST_HEALTH_INTERVAL = 5.0
+# Resumption: how long a session outlives a dropped Heimdall connection, and the downstream bytes kept to replay
+BIFROST_RESUME_GRACE_SECONDS = 30.0
+BIFROST_RESUME_REPLAY_BYTES = 1024 * 1024
+# Admission: live sessions per process, clients that may wait for one and for how long, and the base retry hint
+BIFROST_MAX_SESSIONS = 32
+BIFROST_ADMISSION_QUEUE = 16
+BIFROST_ADMISSION_WAIT_SECONDS = 5.0
+BIFROST_RETRY_AFTER_SECONDS = 5
+# Per-session media budget (decoded chunk bytes per second, with a burst allowance) and largest accepted message
+BIFROST_CLIENT_BYTES_PER_SECOND = 256 * 1024
+BIFROST_CLIENT_BURST_BYTES = 512 * 1024
+BIFROST_MAX_MESSAGE_BYTES = 1024 * 1024
+BIFROST_LOG_LEVEL = os.environ.get("BIFROST_LOG_LEVEL", "INFO")
+# Per-chunk events are logged once every this many occurrences
+BIFROST_LOG_SAMPLE_EVERY = 100
+# JSON library for Bifrost messages: "orjson", "msgspec" or "json"; by default the first one installed
+BIFROST_JSON_CODEC = os.environ.get("BIFROST_JSON_CODEC")
+# Tool calls: how long one may run before the model is told it timed out, and threads for blocking tools
+MJOLNIR_TOOL_TIMEOUT = 10.0
+MJOLNIR_THREAD_WORKERS = 8
+# Prometheus text metrics at http://localhost:9106/metrics (worker N of a multi-process launch uses 9106 + N)
+BIFROST_METRICS_PORT = 9106
+MIMIR_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Pre-warmed live sessions: how many may sit ready at once, and how long one may idle before it is closed
+YGGDRASIL_POOL_SIZE = 4
+YGGDRASIL_POOL_IDLE_TTL = 60.0
+# The setup index.html sends; sessions for it are warmed before the first browser connects
+YGGDRASIL_WARM_SETUP = {"generation_config": {"response_modalities": ["AUDIO"]}}
+
+# Bifrost binary frames: a 2-byte header (frame version, media kind) followed by the raw payload.
+# Media travels this way once the browser asks for it in its setup message; JSON stays for control messages.
+BIFROST_FRAME_VERSION = 1
+BIFROST_FRAME_HEADER = struct.Struct("!BB")
+BIFROST_MEDIA_KINDS = {
+    1: "audio/pcm",
+    2: "image/jpeg",
+}
+BIFROST_MEDIA_CODES = {mime_type: kind for kind, mime_type in BIFROST_MEDIA_KINDS.items()}
+
+# Queues between the Heimdall and Yggdrasil pumps: total items held, video frames held, and how many bytes
+# of consecutive model PCM may be merged into one send (200 ms at 24 kHz). Upstream audio is already cut
+# into Gjallarhorn frames, so the upstream queue merges no more than one frame.
+BIFROST_QUEUE_SIZE = 64
+BIFROST_QUEUE_MAX_VIDEO = 2
+BIFROST_DOWNSTREAM_COALESCE_BYTES = 9600
+
+# Huginn frame gate: difference-hash grid size, Hamming distances for "unchanged" and "new scene",
+# and the bounds on how often frames are forwarded (a static scene still gets a refresh frame)
+HUGINN_HASH_SIZE = 8
+HUGINN_DUPLICATE_BITS = 5
+HUGINN_SCENE_CHANGE_BITS = 16
+HUGINN_MIN_INTERVAL = 1.0
+HUGINN_MAX_INTERVAL = 15.0
+# Forward at most one frame per this many upstream send latencies
+HUGINN_LATENCY_FACTOR = 4.0
+# Camera capture hints sent to Heimdall, lightest load first: (seconds between captures, max width px, JPEG quality).
+# A session moves down a tier per step its upstream send latency (seconds) or upstream queue depth (items) clears.
+HUGINN_CAPTURE_TIERS = (
+    (1.5, 640, 0.75),
+    (3.0, 512, 0.65),
+    (5.0, 384, 0.55),
+    (8.0, 320, 0.45),
+)
+HUGINN_HINT_LATENCY_STEPS = (0.1, 0.25, 0.5)
+HUGINN_HINT_DEPTH_STEPS = (4, 16, 32)
+HUGINN_HINT_SECONDS = 2.0  # how often the hint is re-evaluated
+
+# Gjallarhorn audio stage: browser PCM is 16 kHz mono int16, re-cut into frames of GJALLARHORN_FRAME_MS.
+# A frame is voice when its RMS level clears both the absolute threshold and the tracked noise floor by a margin.
+# The noise floor is the quietest frame of the last GJALLARHORN_FLOOR_WINDOW_MS: speech has pauses, so within a
+# few seconds the minimum falls back to the room's own level, whether that is a quiet desk or a noisy street.
+# Hangover keeps sending after speech so Yggdrasil's own turn detection still hears the pause;
+# pre-roll replays the frames just before an onset so the first syllable is not clipped.
+GJALLARHORN_SAMPLE_RATE = 16000
+GJALLARHORN_FRAME_MS = 100
+GJALLARHORN_SPEECH_DBFS = -50.0
+GJALLARHORN_NOISE_MARGIN_DB = 10.0
+GJALLARHORN_FLOOR_WINDOW_MS = 4000
+GJALLARHORN_HANGOVER_MS = 1000
+GJALLARHORN_PREROLL_MS = 300
+
+logger = logging.getLogger("bifrost")
+bifrost_session_id = contextvars.ContextVar("bifrost_session_id", default="-")
+SAMPLED = {"sampled": True}  # pass as `extra=` for high-frequency events
+
+class BifrostSessionFilter(logging.Filter):
+    """Stamps each record with the Bifrost session it was logged from."""
+
+    def filter(self, record):
+        record.session_id = bifrost_session_id.get()
+        return True
+
+class BifrostSampleFilter(logging.Filter):
+    """Passes one in every `every` records logged with extra=SAMPLED, counted per message."""
+
+    def __init__(self, every=BIFROST_LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.every = every
+        self.seen = collections.Counter()
+
+    def filter(self, record):
+        if not getattr(record, "sampled", False):
+            return True
+        self.seen[record.msg] += 1
+        return (self.seen[record.msg] - 1) % self.every == 0
+
+def setup_bifrost_logging(level=BIFROST_LOG_LEVEL):
+    """Routes Bifrost logs through a queue so formatting and I/O happen on a listener thread.
+
+    Returns the started listener; stop it on exit to flush what is left.
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(BifrostSessionFilter())
+    queue_handler.addFilter(BifrostSampleFilter())
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(
+        "%(asctime)s level=%(levelname)s process=%(process)d session=%(session_id)s %(message)s"
+    ))
+    root_logger = logging.getLogger()
+    root_logger.handlers[:] = [queue_handler]
+    root_logger.setLevel(level)
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    return listener
+
 valkyrie_client = genai.Client(
     http_options={
         'api_version': 'v1alpha',
     }
 )
 
+# Declaration types and argument coercion for tool parameters, by annotated Python type
+MJOLNIR_SCHEMA_TYPES = {
+    int: ("NUMBER", lambda value: int(float(value))),
+    float: ("NUMBER", float),
+    str: ("STRING", str),
+    bool: ("BOOLEAN", lambda value: value if isinstance(value, bool) else str(value).lower() in ("true", "1", "yes")),
+}
+
+class MjolnirTool:
+    """A tool the model may call: its handler, its function declaration, per-argument coercers and time limit.
+
+    `cache_ttl`, when set, marks the tool idempotent: a call repeating the arguments the tool last ran with,
+    within that many seconds, reuses the result.
+    """
+
+    def __init__(self, handler, declaration, coercers, timeout=MJOLNIR_TOOL_TIMEOUT, cache_ttl=None):
+        self.name = declaration["name"]
+        self.handler = handler
+        self.declaration = declaration
+        self.coercers = coercers
+        self.required = declaration["parameters"]["required"]
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.is_coroutine = inspect.iscoroutinefunction(handler)
+
+    def bind_args(self, args):
+        """Coerces the model's args into keyword arguments for the handler; unknown args are ignored."""
+        missing = [name for name in self.required if name not in args]
+        if missing:
+            raise ValueError(f"missing arguments: {', '.join(missing)}")
+        return {name: coerce(args[name]) for name, coerce in self.coercers.items() if name in args}
+
+# Every registered tool, by name, and the toolbox attached to each session config; both filled at import
+mjolnir_tools = {}
+mjolnir_toolbox = {"function_declarations": []}
+
+def mjolnir_tool(description, timeout=MJOLNIR_TOOL_TIMEOUT, cache_ttl=None):
+    """Registers a function as a tool the model may call.
+
+    Each parameter needs an Annotated[type, "description"] hint; parameters without a default are
+    required. The declaration and coercers are built once, when the function is decorated.
+    Pass `cache_ttl` only for idempotent tools, whose repeated calls may skip the handler.
+    """
+    def register(handler):
+        hints = typing.get_type_hints(handler, include_extras=True)
+        properties = {}
+        coercers = {}
+        required = []
+        for name, parameter in inspect.signature(handler).parameters.items():
+            base_type, parameter_description = typing.get_args(hints[name])
+            schema_type, coercers[name] = MJOLNIR_SCHEMA_TYPES[base_type]
+            properties[name] = {"type": schema_type, "description": parameter_description}
+            if parameter.default is inspect.Parameter.empty:
+                required.append(name)
+        declaration = {
+            "name": handler.__name__,
+            "description": description,
+            "parameters": {"type": "OBJECT", "properties": properties, "required": required},
+        }
+        mjolnir_tools[handler.__name__] = MjolnirTool(handler, declaration, coercers, timeout, cache_ttl)
+        mjolnir_toolbox["function_declarations"].append(declaration)
+        return handler
+    return register
+
 # Mock function for lighting adjustments (representing Mjölnir's power)
-def wield_mjolnir(luminosity, aura_hue):
+@mjolnir_tool("Channel the power of Mjölnir to adjust light luminosity and aura hue.", cache_ttl=30.0)
+def wield_mjolnir(
+    luminosity: typing.Annotated[int, "Light intensity from 0 to 100. Zero signifies darkness, and 100 represents full illumination."],
+    aura_hue: typing.Annotated[str, "The hue of light aura, which can be `daylight`, `cool`, or `warm`."],
+):
     """Adjusts light settings using Mjölnir's strength."""
     return {
         "luminosity": luminosity,
         "auraHue": aura_hue,
     }
 
-# Define the divine tool
-tool_wield_mjolnir = {
-    "function_declarations": [
-        {
-            "name": "wield_mjolnir",
-            "description": "Channel the power of Mjölnir to adjust light luminosity and aura hue.",
-            "parameters": {
-                "type": "OBJECT",
-                "properties": {
-                    "luminosity": {
-                        "type": "NUMBER",
-                        "description": "Light intensity from 0 to 100. Zero signifies darkness, and 100 represents full illumination."
-                    },
-                    "aura_hue": {
-                        "type": "STRING",
-                        "description": "The hue of light aura, which can be `daylight`, `cool`, or `warm`."
-                    }
-                },
-                "required": ["luminosity", "aura_hue"]
-            }
+class MimirMetrics:
+    """In-process counters, gauges and histograms rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self.descriptions = {}  # metric name -> (type, help)
+        self.values = {}  # (metric name, sorted label pairs) -> number
+        self.histograms = {}  # (metric name, sorted label pairs) -> [bucket counts, sum, count]
+
+    def describe(self, name, kind, help_text):
+        self.descriptions[name] = (kind, help_text)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        self.values[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = [[0] * len(MIMIR_LATENCY_BUCKETS), 0.0, 0]
+        for index, bound in enumerate(MIMIR_LATENCY_BUCKETS):
+            if value <= bound:
+                histogram[0][index] += 1
+        histogram[1] += value
+        histogram[2] += 1
+
+    @staticmethod
+    def label_text(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+    def render(self):
+        lines = []
+        for name, (kind, help_text) in sorted(self.descriptions.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (metric, labels), value in sorted(self.values.items()):
+                if metric == name:
+                    lines.append(f"{name}{self.label_text(labels)} {value}")
+            for (metric, labels), (buckets, total, count) in sorted(self.histograms.items()):
+                if metric != name:
+                    continue
+                for bound, bucket_count in zip(MIMIR_LATENCY_BUCKETS, buckets):
+                    lines.append(f"{name}_bucket{self.label_text(labels, [('le', bound)])} {bucket_count}")
+                lines.append(f"{name}_bucket{self.label_text(labels, [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_sum{self.label_text(labels)} {total}")
+                lines.append(f"{name}_count{self.label_text(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+mimir = MimirMetrics()
+mimir.describe("bifrost_active_sessions", "gauge", "Open Heimdall sessions; a resumed session counts once.")
+mimir.describe("bifrost_chunks_total", "counter", "Media chunks relayed, by direction and mime type.")
+mimir.describe("bifrost_bytes_total", "counter", "Media payload bytes relayed, by direction and mime type.")
+mimir.describe("bifrost_first_audio_seconds", "histogram", "Time from the last client audio frame sent upstream to the first model audio of the turn.")
+mimir.describe("bifrost_tool_seconds", "histogram", "Tool call execution time.")
+mimir.describe("bifrost_tool_cache_hits_total", "counter", "Tool calls answered from the result cache.")
+mimir.describe("bifrost_queue_depth", "gauge", "Items waiting in Bifrost queues, summed over sessions.")
+mimir.describe("bifrost_queue_dropped_total", "counter", "Video frames dropped by Bifrost queues.")
+mimir.describe("bifrost_queue_coalesced_total", "counter", "PCM chunks merged into a queued chunk.")
+mimir.describe("bifrost_admission_waiting", "gauge", "Clients waiting for a session slot.")
+mimir.describe("bifrost_admission_rejected_total", "counter", "Clients turned away, by reason.")
+mimir.describe("bifrost_admission_abandoned_total", "counter", "Clients that hung up while waiting for a session slot.")
+mimir.describe("bifrost_throttled_total", "counter", "Media chunks over the per-session byte budget, by mime type and action.")
+mimir.describe("bifrost_resumes_total", "counter", "Dropped Heimdall connections, by whether the client came back in time.")
+mimir.describe("bifrost_replay_dropped_total", "counter", "Downstream messages evicted from full replay buffers.")
+
+async def serve_mimir_metrics(reader, writer):
+    """Answers one HTTP request with the current metrics."""
+    try:
+        request_line = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        if request_line.split(b" ")[1:2] == [b"/metrics"]:
+            mimir.set("bifrost_active_sessions", len(heimdall_sessions))
+            mimir.set("bifrost_admission_waiting", len(bifrost_admission.waiters))
+            body = mimir.render().encode("utf-8")
+            head = "HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+        else:
+            body = b"not found\n"
+            head = "HTTP/1.1 404 Not Found\r\nContent-Type: text/plain\r\n"
+        writer.write(f"{head}Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii") + body)
+        await writer.drain()
+    finally:
+        writer.close()
+
+class YggdrasilSessionPool:
+    """Keeps pre-connected Yggdrasil live sessions ready so a new Bifrost connection skips the handshake.
+
+    Sessions are keyed by model and config (tools included). A live session carries its conversation,
+    so one is never handed to a second connection: it is closed on disconnect and the pool refills.
+    """
+
+    def __init__(self, client, model, max_size=YGGDRASIL_POOL_SIZE, idle_ttl=YGGDRASIL_POOL_IDLE_TTL):
+        self.client = client
+        self.model = model
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.warm_sessions = {}  # config key -> [(exit stack, session, warmed at)]
+        self.warming_tasks = set()
+        self.background_tasks = set()
+        self.reaper_task = None
+
+    def config_key(self, config):
+        return json.dumps([self.model, config], sort_keys=True, default=str)
+
+    def warm_count(self):
+        return sum(len(entries) for entries in self.warm_sessions.values())
+
+    async def connect(self, config):
+        """Opens a live session and returns it with the exit stack that closes it."""
+        exit_stack = contextlib.AsyncExitStack()
+        try:
+            yggdrasil_session = await exit_stack.enter_async_context(
+                self.client.aio.live.connect(model=self.model, config=config)
+            )
+        except BaseException:
+            await exit_stack.aclose()
+            raise
+        return exit_stack, yggdrasil_session
+
+    def prewarm(self, config, count=1):
+        """Starts warming `count` sessions for `config` in the background, evicting the stalest if full."""
+        key = self.config_key(config)
+        for _ in range(count):
+            if self.warm_count() + len(self.warming_tasks) >= self.max_size:
+                if not self.evict_oldest():
+                    return
+            warming_task = asyncio.create_task(self.warm_one(key, copy.deepcopy(config)))
+            self.warming_tasks.add(warming_task)
+            warming_task.add_done_callback(self.warming_tasks.discard)
+        if self.reaper_task is None:
+            self.reaper_task = asyncio.create_task(self.reap_idle())
+
+    async def warm_one(self, key, config):
+        try:
+            exit_stack, yggdrasil_session = await self.connect(config)
+        except Exception as e:
+            logger.error("Error pre-warming Yggdrasil session: %s", e)
+            return
+        self.warm_sessions.setdefault(key, []).append((exit_stack, yggdrasil_session, time.monotonic()))
+
+    def take(self, key):
+        """Pops the freshest warm session for `key`, or None."""
+        entries = self.warm_sessions.get(key)
+        while entries:
+            exit_stack, yggdrasil_session, warmed_at = entries.pop()
+            if time.monotonic() - warmed_at < self.idle_ttl:
+                return exit_stack, yggdrasil_session
+            self.discard(exit_stack)
+        return None
+
+    def evict_oldest(self):
+        oldest = None
+        for key, entries in self.warm_sessions.items():
+            if entries and (oldest is None or entries[0][2] < oldest[1][0][2]):
+                oldest = (key, entries)
+        if oldest is None:
+            return False
+        exit_stack, _, _ = oldest[1].pop(0)
+        self.discard(exit_stack)
+        return True
+
+    def discard(self, exit_stack):
+        background_task = asyncio.create_task(exit_stack.aclose())
+        self.background_tasks.add(background_task)
+        background_task.add_done_callback(self.background_tasks.discard)
+
+    async def reap_idle(self):
+        """Closes warm sessions that sat unused past the idle TTL."""
+        while True:
+            await asyncio.sleep(self.idle_ttl / 2)
+            now = time.monotonic()
+            for key, entries in self.warm_sessions.items():
+                stale = [entry for entry in entries if now - entry[2] >= self.idle_ttl]
+                for entry in stale:
+                    entries.remove(entry)
+                    self.discard(entry[0])
+
+    @contextlib.asynccontextmanager
+    async def session(self, config):
+        """Yields a live session for `config`, warm if one is ready, and refills the pool behind it."""
+        warm = self.take(self.config_key(config))
+        if warm is None:
+            exit_stack, yggdrasil_session = await self.connect(config)
+            logger.info("Connected to Yggdrasil API")
+        else:
+            exit_stack, yggdrasil_session = warm
+            logger.info("Connected to Yggdrasil API (pre-warmed)")
+        self.prewarm(config)
+        try:
+            yield yggdrasil_session
+        finally:
+            await exit_stack.aclose()
+
+    async def close(self):
+        if self.reaper_task is not None:
+            self.reaper_task.cancel()
+        for warming_task in list(self.warming_tasks):
+            warming_task.cancel()
+        for entries in self.warm_sessions.values():
+            for exit_stack, _, _ in entries:
+                await exit_stack.aclose()
+        self.warm_sessions.clear()
+
+yggdrasil_pool = YggdrasilSessionPool(valkyrie_client, YGGDRASIL_MODEL)
+
+class MjolnirLedger:
+    """What each cached tool last did to its device. The device is shared, so one ledger serves the whole process."""
+
+    def __init__(self):
+        self.results = {}  # tool name -> (normalized args, expires at, outcome) of its last applied call
+        self.in_flight = {}  # tool name -> (normalized args, future) of its latest running call
+
+mjolnir_ledger = MjolnirLedger()
+
+class MjolnirExecutor:
+    """Runs the function calls of a tool call concurrently and collects their responses.
+
+    Coroutine handlers run on the event loop; plain ones run on a thread pool so a blocking device
+    call cannot stall audio. Every call gets a response, an error one if it failed or timed out.
+    A timed-out thread keeps running until its handler returns; only the wait is abandoned.
+
+    Tools with a cache_ttl skip the handler when a call repeats the arguments that tool last ran with, and
+    join the tool's running call when it has those arguments, so the device is not commanded twice. Only
+    the last applied arguments count: after A then B, a second A runs again, whichever sessions made the
+    calls, since every executor consults and updates the same `ledger`. Sessions may share a thread pool.
+    """
+
+    def __init__(self, tools, threads=None, max_workers=MJOLNIR_THREAD_WORKERS, ledger=None):
+        self.tools = tools
+        self.threads = threads or concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mjolnir")
+        self.ledger = ledger if ledger is not None else mjolnir_ledger
+
+    async def call(self, tool, kwargs):
+        if tool.is_coroutine:
+            pending = tool.handler(**kwargs)
+        else:
+            pending = asyncio.get_running_loop().run_in_executor(self.threads, functools.partial(tool.handler, **kwargs))
+        return await asyncio.wait_for(pending, tool.timeout)
+
+    async def call_cached(self, tool, kwargs):
+        """Reuses the tool's last result if these are its last applied arguments, otherwise runs the tool."""
+        args = json.dumps(kwargs, sort_keys=True, default=str)
+        ledger = self.ledger
+        running = ledger.in_flight.get(tool.name)
+        if running is not None and running[0] == args:
+            return await asyncio.shield(running[1])
+        cached = ledger.results.get(tool.name)
+        if cached is not None and cached[0] == args and cached[1] > time.monotonic():
+            mimir.inc("bifrost_tool_cache_hits_total", tool=tool.name)
+            return cached[2]
+
+        # Different arguments change the device's state, so whatever was remembered for the tool is stale
+        ledger.results.pop(tool.name, None)
+        future = asyncio.ensure_future(self.call(tool, kwargs))
+        ledger.in_flight[tool.name] = (args, future)
+        try:
+            outcome = await asyncio.shield(future)
+        finally:
+            if ledger.in_flight.get(tool.name, (None, None))[1] is future:
+                del ledger.in_flight[tool.name]
+        # A newer call may have started meanwhile; only the latest call's arguments are the applied ones
+        if tool.name not in ledger.in_flight:
+            ledger.results[tool.name] = (args, time.monotonic() + tool.cache_ttl, outcome)
+        return outcome
+
+    async def invoke(self, invocation):
+        tool = self.tools.get(invocation.name)
+        if tool is None:
+            logger.warning("Unknown tool requested: %s", invocation.name)
+            return {"name": invocation.name, "response": {"error": "unknown tool"}, "id": invocation.id}
+
+        started_at = time.monotonic()
+        try:
+            kwargs = tool.bind_args(invocation.args or {})
+            if tool.cache_ttl:
+                outcome = await self.call_cached(tool, kwargs)
+            else:
+                outcome = await self.call(tool, kwargs)
+        except asyncio.TimeoutError:
+            logger.error("Tool %s timed out after %.1fs", invocation.name, tool.timeout)
+            return {"name": invocation.name, "response": {"error": "timed out"}, "id": invocation.id}
+        except Exception as e:
+            logger.error("Error wielding %s: %s", invocation.name, e)
+            return {"name": invocation.name, "response": {"error": str(e)}, "id": invocation.id}
+        finally:
+            mimir.observe("bifrost_tool_seconds", time.monotonic() - started_at, tool=invocation.name)
+        return {"name": invocation.name, "response": {"result": outcome}, "id": invocation.id}
+
+    async def execute(self, function_calls):
+        """Runs every call at once and returns their responses in call order."""
+        return list(await asyncio.gather(*(self.invoke(invocation) for invocation in function_calls)))
+
+# Thread pool shared by every session's executor
+mjolnir_threads = concurrent.futures.ThreadPoolExecutor(max_workers=MJOLNIR_THREAD_WORKERS, thread_name_prefix="mjolnir")
+
+class BifrostOverloaded(Exception):
+    """A new session was turned away; `retry_after` is the client's hint in seconds."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class BifrostAbandoned(Exception):
+    """A client hung up while waiting for a session slot."""
+
+class BifrostAdmission:
+    """Caps live sessions per process. Past the cap, up to `max_waiting` clients queue (first come, first
+    served) for `wait_seconds`; everyone else is rejected at once with a retry hint.
+    """
+
+    def __init__(self, max_sessions=BIFROST_MAX_SESSIONS, max_waiting=BIFROST_ADMISSION_QUEUE,
+                 wait_seconds=BIFROST_ADMISSION_WAIT_SECONDS):
+        self.max_sessions = max_sessions
+        self.max_waiting = max_waiting
+        self.wait_seconds = wait_seconds
+        self.active = 0
+        self.waiters = collections.deque()
+
+    def full(self):
+        """True when a newcomer could neither start nor wait."""
+        return self.active >= self.max_sessions and len(self.waiters) >= self.max_waiting
+
+    def reject(self, reason):
+        mimir.inc("bifrost_admission_rejected_total", reason=reason)
+        # Jitter spreads the retries of a rejected crowd instead of bringing it back all at once
+        return BifrostOverloaded(reason, round(BIFROST_RETRY_AFTER_SECONDS * random.uniform(1.0, 2.0)))
+
+    def release(self):
+        """Hands the slot to the longest waiter, or frees it."""
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @contextlib.asynccontextmanager
+    async def admit(self, connection=None):
+        """Holds a session slot for the body, waiting for one if needed; raises BifrostOverloaded otherwise.
+
+        A waiting client whose `connection` closes first gets BifrostAbandoned instead, so a slot is never
+        spent on a client that already left.
+        """
+        if self.active < self.max_sessions:
+            self.active += 1
+        elif len(self.waiters) >= self.max_waiting:
+            raise self.reject("queue_full")
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            gone = asyncio.ensure_future(connection.wait_closed()) if connection is not None else None
+            try:
+                await asyncio.wait([waiter] + ([gone] if gone else []), timeout=self.wait_seconds,
+                                   return_when=asyncio.FIRST_COMPLETED)
+                if gone is not None and gone.done():
+                    mimir.inc("bifrost_admission_abandoned_total")
+                    raise BifrostAbandoned()
+                if not waiter.done():
+                    raise asyncio.TimeoutError()
+            except BaseException as e:
+                if waiter.done() and not waiter.cancelled():
+                    self.release()  # a slot arrived just as this client gave up; pass it on
+                else:
+                    waiter.cancel()
+                with contextlib.suppress(ValueError):
+                    self.waiters.remove(waiter)
+                if isinstance(e, asyncio.TimeoutError):
+                    raise self.reject("wait_timeout") from None
+                raise
+            finally:
+                if gone is not None:
+                    gone.cancel()
+        try:
+            yield
+        finally:
+            self.release()
+
+bifrost_admission = BifrostAdmission()
+
+class BifrostTokenBucket:
+    """Byte budget refilled at `rate` per second up to `burst`."""
+
+    def __init__(self, rate=BIFROST_CLIENT_BYTES_PER_SECOND, burst=BIFROST_CLIENT_BURST_BYTES):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_take(self, size):
+        """Spends `size` bytes if the budget has them; returns whether it did."""
+        self.refill()
+        if self.tokens < size:
+            return False
+        self.tokens -= size
+        return True
+
+    def take(self, size):
+        """Spends `size` bytes, going into debt if needed; returns how long to wait until the debt is paid."""
+        self.refill()
+        self.tokens -= size
+        return max(0.0, -self.tokens / self.rate)
+
+class BifrostQueue:
+    """Bounded queue between a Bifrost pump and its sender, with a policy per kind of item.
+
+    Video frames never wait: past `max_video` queued frames the oldest is dropped. Audio and text are
+    never dropped; the producer waits for room instead. Consecutive PCM chunks are merged while the
+    merged chunk stays within `coalesce_bytes`.
+    """
+
+    def __init__(self, name, max_items=BIFROST_QUEUE_SIZE, max_video=BIFROST_QUEUE_MAX_VIDEO, coalesce_bytes=0):
+        self.name = name
+        self.max_items = max_items
+        self.max_video = max_video
+        self.coalesce_bytes = coalesce_bytes
+        self.items = collections.deque()
+        self.video_count = 0
+        self.changed = asyncio.Condition()
+        self.high_water = 0
+        self.enqueued = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    async def put(self, kind, payload):
+        async with self.changed:
+            if kind == "image/jpeg":
+                if self.video_count >= self.max_video:
+                    self.drop_oldest_video()
+                self.video_count += 1
+            elif kind == "audio/pcm" and self.items and self.items[-1][0] == "audio/pcm" \
+                    and len(self.items[-1][1]) + len(payload) <= self.coalesce_bytes:
+                self.items[-1] = ("audio/pcm", self.items[-1][1] + payload)
+                self.coalesced += 1
+                mimir.inc("bifrost_queue_coalesced_total", queue=self.name)
+                return
+            else:
+                await self.changed.wait_for(lambda: len(self.items) < self.max_items)
+            self.items.append((kind, payload))
+            mimir.inc("bifrost_queue_depth", queue=self.name)
+            self.enqueued += 1
+            self.high_water = max(self.high_water, len(self.items))
+            self.changed.notify_all()
+
+    def drop_oldest_video(self):
+        for index, (kind, _) in enumerate(self.items):
+            if kind == "image/jpeg":
+                del self.items[index]
+                self.video_count -= 1
+                self.dropped += 1
+                mimir.inc("bifrost_queue_depth", -1, queue=self.name)
+                mimir.inc("bifrost_queue_dropped_total", queue=self.name)
+                return
+
+    async def get(self):
+        async with self.changed:
+            await self.changed.wait_for(lambda: self.items)
+            kind, payload = self.items.popleft()
+            mimir.inc("bifrost_queue_depth", -1, queue=self.name)
+            if kind == "image/jpeg":
+                self.video_count -= 1
+            self.changed.notify_all()
+            return kind, payload
+
+    async def wait_empty(self):
+        """Waits until the sender has taken everything queued so far."""
+        async with self.changed:
+            await self.changed.wait_for(lambda: not self.items)
+
+    def discard(self):
+        """Forgets whatever is still queued when the session ends."""
+        mimir.inc("bifrost_queue_depth", -len(self.items), queue=self.name)
+        self.items.clear()
+        self.video_count = 0
+
+    def metrics(self):
+        return {
+            "queue": self.name,
+            "depth": len(self.items),
+            "high_water": self.high_water,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
         }
-    ]
-}
+
+class HuginnFrameGate:
+    """Drops near-duplicate video frames and paces the rest by scene change and upstream latency.
+
+    Each JPEG is decoded at reduced scale and reduced to a difference hash. A frame close to the last
+    forwarded one is dropped until HUGINN_MAX_INTERVAL has passed. The forwarding interval backs off
+    while the scene stays calm, snaps back on a scene change, and never drops below a multiple of the
+    observed upstream send latency.
+    """
+
+    def __init__(self):
+        self.last_hash = None
+        self.last_forwarded = 0.0
+        self.interval = HUGINN_MIN_INTERVAL
+        self.upstream_latency = 0.0
+        self.forwarded = 0
+        self.dropped = 0
+
+    @staticmethod
+    def frame_hash(jpeg):
+        with Image.open(io.BytesIO(jpeg)) as image:
+            image.draft("L", (HUGINN_HASH_SIZE * 8, HUGINN_HASH_SIZE * 8))  # let libjpeg decode at 1/2..1/8 scale
+            pixels = np.asarray(image.convert("L").resize((HUGINN_HASH_SIZE + 1, HUGINN_HASH_SIZE), Image.BILINEAR), dtype=np.int16)
+        return pixels[:, 1:] > pixels[:, :-1]
+
+    def observe_latency(self, seconds):
+        self.upstream_latency = 0.8 * self.upstream_latency + 0.2 * seconds
+
+    def capture_hint(self, queue_depth):
+        """The camera settings Heimdall should capture with, given current upstream pressure."""
+        tier = max(
+            sum(self.upstream_latency >= step for step in HUGINN_HINT_LATENCY_STEPS),
+            sum(queue_depth >= step for step in HUGINN_HINT_DEPTH_STEPS),
+        )
+        interval, max_width, quality = HUGINN_CAPTURE_TIERS[tier]
+        return {"interval_ms": int(interval * 1000), "max_width": max_width, "quality": quality}
+
+    def admit(self, jpeg, now=None):
+        """Returns True if this frame should be forwarded to Yggdrasil."""
+        now = time.monotonic() if now is None else now
+        try:
+            frame_hash = self.frame_hash(jpeg)
+        except Exception as e:
+            logger.warning("Error hashing frame: %s", e)
+            return True
+
+        elapsed = now - self.last_forwarded
+        latency_floor = self.upstream_latency * HUGINN_LATENCY_FACTOR
+        if self.last_hash is None:
+            distance = frame_hash.size
+        else:
+            distance = int(np.count_nonzero(frame_hash != self.last_hash))
+
+        if distance >= HUGINN_SCENE_CHANGE_BITS:
+            self.interval = HUGINN_MIN_INTERVAL
+            admitted = elapsed >= max(HUGINN_MIN_INTERVAL, latency_floor)
+        elif distance <= HUGINN_DUPLICATE_BITS:
+            admitted = elapsed >= HUGINN_MAX_INTERVAL
+        else:
+            admitted = elapsed >= max(self.interval, latency_floor)
+
+        if not admitted:
+            self.dropped += 1
+            return False
+        if distance < HUGINN_SCENE_CHANGE_BITS:
+            self.interval = min(self.interval * 2, HUGINN_MAX_INTERVAL)
+        self.last_hash = frame_hash
+        self.last_forwarded = now
+        self.forwarded += 1
+        return True
+
+class GjallarhornVoiceGate:
+    """Re-frames browser PCM to a fixed size and holds back frames that are only silence."""
+
+    def __init__(self, frame_ms=GJALLARHORN_FRAME_MS, sample_rate=GJALLARHORN_SAMPLE_RATE):
+        self.frame_bytes = sample_rate * frame_ms // 1000 * 2
+        self.hangover_frames = max(1, GJALLARHORN_HANGOVER_MS // frame_ms)
+        self.pending = bytearray()
+        self.preroll = collections.deque(maxlen=max(1, GJALLARHORN_PREROLL_MS // frame_ms))
+        self.hangover_left = 0
+        self.noise_floor = GJALLARHORN_SPEECH_DBFS - GJALLARHORN_NOISE_MARGIN_DB
+        # Starts at the quiet default, so nothing is gated until a full window of the room has been heard
+        window = max(1, GJALLARHORN_FLOOR_WINDOW_MS // frame_ms)
+        self.recent_levels = collections.deque([self.noise_floor] * window, maxlen=window)
+        self.forwarded = 0
+        self.gated = 0
+
+    def frame_levels(self, frames):
+        """Returns the RMS level in dBFS of each row of int16 samples."""
+        samples = frames.astype(np.float32) / 32768.0
+        rms = np.sqrt(np.mean(samples * samples, axis=1))
+        return 20.0 * np.log10(rms + 1e-9)
+
+    def feed(self, pcm):
+        """Takes a chunk of PCM and returns the whole frames that should go to Yggdrasil."""
+        self.pending += pcm
+        frame_count = len(self.pending) // self.frame_bytes
+        if frame_count == 0:
+            return []
+        cut = frame_count * self.frame_bytes
+        block = bytes(self.pending[:cut])
+        del self.pending[:cut]
+        levels = self.frame_levels(np.frombuffer(block, dtype="<i2").reshape(frame_count, -1))
+
+        outgoing = []
+        for index, level in enumerate(levels):
+            frame = block[index * self.frame_bytes:(index + 1) * self.frame_bytes]
+            if level >= max(GJALLARHORN_SPEECH_DBFS, self.noise_floor + GJALLARHORN_NOISE_MARGIN_DB):
+                if self.hangover_left == 0:
+                    outgoing.extend(self.preroll)
+                    self.preroll.clear()
+                outgoing.append(frame)
+                self.hangover_left = self.hangover_frames
+            elif self.hangover_left > 0:
+                outgoing.append(frame)
+                self.hangover_left -= 1
+            else:
+                if len(self.preroll) == self.preroll.maxlen:
+                    self.gated += 1
+                self.preroll.append(frame)
+            self.recent_levels.append(float(level))
+            self.noise_floor = min(self.recent_levels)
+        self.forwarded += len(outgoing)
+        return outgoing
+
+HEIMDALL_MEDIA_TYPES = ("audio/pcm", "image/jpeg")  # media Heimdall may send; anything else is ignored
+
+class HeimdallChunk(typing.NamedTuple):
+    """One media chunk from Heimdall, already decoded to raw bytes."""
+    mime_type: str
+    data: bytes
+
+def forge_bifrost_frame(mime_type, payload):
+    """Packs a media payload into a Bifrost binary frame."""
+    kind = BIFROST_MEDIA_CODES[mime_type.split(";", 1)[0]]
+    return BIFROST_FRAME_HEADER.pack(BIFROST_FRAME_VERSION, kind) + payload
+
+def split_bifrost_frame(frame):
+    """Unpacks a Bifrost binary frame into its mime type and raw payload."""
+    if len(frame) < BIFROST_FRAME_HEADER.size:
+        raise ValueError(f"Bifrost frame too short: {len(frame)} bytes")
+    version, kind = BIFROST_FRAME_HEADER.unpack_from(frame)
+    if version != BIFROST_FRAME_VERSION:
+        raise ValueError(f"Unsupported Bifrost frame version: {version}")
+    if kind not in BIFROST_MEDIA_KINDS:
+        raise ValueError(f"Unknown Bifrost media kind: {kind}")
+    return HeimdallChunk(BIFROST_MEDIA_KINDS[kind], frame[BIFROST_FRAME_HEADER.size:])
+
+if msgspec is not None:
+    class HeimdallMediaChunk(msgspec.Struct):
+        mime_type: str
+        data: bytes  # msgspec decodes the base64 string straight into bytes
+
+    class HeimdallRealtimeInput(msgspec.Struct):
+        media_chunks: typing.List[HeimdallMediaChunk] = []
+
+    class HeimdallMessage(msgspec.Struct):
+        realtime_input: typing.Optional[HeimdallRealtimeInput] = None
+
+class BifrostCodec:
+    """JSON for Bifrost messages, backed by orjson or msgspec when installed and the json module otherwise.
+
+    `dumps` returns UTF-8 bytes, which go out as text frames without being decoded first.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or ("orjson" if orjson else "msgspec" if msgspec else "json")
+        if self.backend == "orjson":
+            self.dumps = orjson.dumps
+            self.loads = orjson.loads
+        elif self.backend == "msgspec":
+            self.dumps = msgspec.json.Encoder().encode
+            self.loads = msgspec.json.Decoder().decode
+            self.message_decoder = msgspec.json.Decoder(HeimdallMessage)
+        elif self.backend == "json":
+            self.dumps = lambda obj: json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self.loads = json.loads
+        else:
+            raise ValueError(f"Unknown Bifrost JSON codec: {self.backend}")
+
+    def read_media_chunks(self, text):
+        """Decodes a JSON message from Heimdall into the media chunks it carries."""
+        if self.backend == "msgspec":
+            realtime_input = self.message_decoder.decode(text).realtime_input
+            chunks = realtime_input.media_chunks if realtime_input is not None else []
+            return [HeimdallChunk(chunk.mime_type, chunk.data) for chunk in chunks if chunk.mime_type in HEIMDALL_MEDIA_TYPES]
+        realtime_input = self.loads(text).get("realtime_input")
+        if realtime_input is None:
+            return []
+        return [
+            HeimdallChunk(chunk["mime_type"], base64.b64decode(chunk["data"]))
+            for chunk in realtime_input["media_chunks"]
+            if chunk["mime_type"] in HEIMDALL_MEDIA_TYPES
+        ]
+
+bifrost_codec = BifrostCodec(BIFROST_JSON_CODEC)
+
+# Downstream JSON envelopes are filled in around their payload rather than built as dicts and serialized
+HEIMDALL_TEXT_ENVELOPE = (b'{"text":', b'}')
+HEIMDALL_AUDIO_ENVELOPE = (b'{"audio":"', b'"}')  # base64 never needs escaping inside a JSON string
+
+def read_heimdall_message(heimdall_message):
+    """Returns the media chunks carried by one message from Heimdall."""
+    if isinstance(heimdall_message, bytes):
+        return [split_bifrost_frame(heimdall_message)]
+    return bifrost_codec.read_media_chunks(heimdall_message)
+
+def heimdall_envelope(kind, payload, binary_bifrost):
+    """Encodes one downstream item as the message Heimdall expects.
+
+    Returns bytes either way; only audio in binary mode goes out as a binary frame.
+    """
+    if kind == "text":
+        prefix, suffix = HEIMDALL_TEXT_ENVELOPE
+        return prefix + bifrost_codec.dumps(payload) + suffix
+    if kind == "control":
+        return payload  # already serialized by the session
+    if binary_bifrost:
+        return forge_bifrost_frame(kind, payload)
+    prefix, suffix = HEIMDALL_AUDIO_ENVELOPE
+    return prefix + base64.b64encode(payload) + suffix
+
+class BifrostResumption:
+    """Lets a Bifrost session outlive its Heimdall connection for a grace window.
+
+    While no client is attached, downstream messages go to a replay ring bounded by `replay_bytes` (oldest
+    evicted first). A client that reconnects with the session's token inside the window is attached in
+    place of the old connection and sent the ring before anything new.
+    """
+
+    def __init__(self, session_id, grace=BIFROST_RESUME_GRACE_SECONDS, replay_bytes=BIFROST_RESUME_REPLAY_BYTES):
+        self.token = secrets.token_urlsafe(16)
+        self.session_id = session_id
+        self.grace = grace
+        self.replay_bytes = replay_bytes
+        self.connection = None
+        self.attached = asyncio.Event()
+        self.replay = collections.deque()
+        self.replay_size = 0
+        self.replay_dropped = 0
+        self.resumes = 0
+
+    def attach(self, connection):
+        self.connection = connection
+        self.attached.set()
+
+    def detach(self, connection):
+        """Forgets `connection` if it is still the attached one."""
+        if self.connection is connection:
+            self.connection = None
+            self.attached.clear()
+
+    def buffer(self, envelope, text):
+        """Keeps a downstream message for the next client to attach."""
+        self.replay.append((envelope, text))
+        self.replay_size += len(envelope)
+        while self.replay_size > self.replay_bytes and len(self.replay) > 1:
+            dropped, _ = self.replay.popleft()
+            self.replay_size -= len(dropped)
+            self.replay_dropped += 1
+            mimir.inc("bifrost_replay_dropped_total")
+
+    async def wait_for_client(self):
+        """Waits out the grace window for a client to resume; returns whether one did."""
+        try:
+            await asyncio.wait_for(self.attached.wait(), self.grace)
+        except asyncio.TimeoutError:
+            mimir.inc("bifrost_resumes_total", outcome="expired")
+            return False
+        mimir.inc("bifrost_resumes_total", outcome="resumed")
+        return True
+
+    async def resume(self, connection):
+        """Replays what the session produced while detached, then attaches `connection`."""
+        while self.replay:
+            envelope, text = self.replay.popleft()
+            try:
+                await connection.send(envelope, text=text)
+            except websockets.exceptions.ConnectionClosed:
+                self.replay.appendleft((envelope, text))
+                raise
+            self.replay_size -= len(envelope)
+        # No await between the last emptiness check and attaching, so nothing buffered is left behind
+        self.resumes += 1
+        self.attach(connection)
+
+# Open Heimdall connections in this process, one per session: a connection resuming a session is left out,
+# since the session's first connection stays here until the session ends
+heimdall_sessions = set()
+bifrost_draining = False  # set once this process stops accepting connections
+bifrost_drain_requests = set()  # one event per running session, set when draining begins
+bifrost_resumable = {}  # resume token -> BifrostResumption of every live session in this process
+
+def bifrost_session_notice(resumption, resumed):
+    """The control message telling Heimdall how to resume its session."""
+    return bifrost_codec.dumps({"bifrost": {
+        "session": resumption.token,
+        "resume_seconds": resumption.grace,
+        "resumed": resumed,
+    }})
+
+async def resume_bifrost_session(heimdall_connection, resumption):
+    """Attaches a reconnecting client to its running session and holds the connection open for it."""
+    bifrost_session_id.set(resumption.session_id)
+    heimdall_sessions.discard(heimdall_connection)
+    previous = resumption.connection
+    if previous is not None:
+        # The old socket is usually half-open after a network change; drop it so the session reads from this one
+        resumption.detach(previous)
+        previous.transport.abort()
+    logger.info("Heimdall resuming session (%d messages to replay)", len(resumption.replay))
+    await heimdall_connection.send(bifrost_session_notice(resumption, resumed=True), text=True)
+    await resumption.resume(heimdall_connection)
+    await heimdall_connection.wait_closed()
 
 async def bifrost_handler(heimdall_connection: websockets.WebSocketServerProtocol):
     """Handles the interaction with Yggdrasil API via Bifrost (WebSocket).
@@ -55,113 +1076,394 @@ async def bifrost_handler(heimdall_connection: websockets.WebSocketServerProtoco
     Args:
         heimdall_connection: The WebSocket connection representing Heimdall's watch.
     """
+    heimdall_sessions.add(heimdall_connection)
+    bifrost_session_id.set(uuid.uuid4().hex[:8])
     try:
         asgardian_message = await heimdall_connection.recv()
-        asgardian_data = json.loads(asgardian_message)
+        asgardian_data = bifrost_codec.loads(asgardian_message)
         asgardian_config = asgardian_data.get("setup", {})
+        bifrost_options = asgardian_data.get("bifrost", {})
+        binary_bifrost = bool(bifrost_options.get("binary", False))
+        resumable = bifrost_resumable.get(bifrost_options.get("resume"))
+        if resumable is not None:
+            await resume_bifrost_session(heimdall_connection, resumable)
+            return
         
-        asgardian_config["tools"] = [tool_wield_mjolnir]
+        asgardian_config["tools"] = [mjolnir_toolbox]
         
-        async with valkyrie_client.aio.live.connect(model=YGGDRASIL_MODEL, config=asgardian_config) as yggdrasil_session:
-            print("Connected to Yggdrasil API")
+        async with bifrost_admission.admit(heimdall_connection), yggdrasil_pool.session(asgardian_config) as yggdrasil_session:
+            resumption = BifrostResumption(bifrost_session_id.get())
+            resumption.attach(heimdall_connection)
+            bifrost_resumable[resumption.token] = resumption
+            await heimdall_connection.send(bifrost_session_notice(resumption, resumed=False), text=True)
+            huginn_gate = HuginnFrameGate()
+            gjallarhorn_gate = GjallarhornVoiceGate()
+            upstream_queue = BifrostQueue("upstream", coalesce_bytes=gjallarhorn_gate.frame_bytes)
+            downstream_queue = BifrostQueue("downstream", coalesce_bytes=BIFROST_DOWNSTREAM_COALESCE_BYTES)
+            media_budget = BifrostTokenBucket()
+            last_upstream_audio_at = None
+            awaiting_first_audio = True
+            mjolnir_executor = MjolnirExecutor(mjolnir_tools, threads=mjolnir_threads)
+            mjolnir_tasks = set()
+            turn_idle = asyncio.Event()  # cleared while Yggdrasil is in the middle of a turn
+            turn_idle.set()
+            drain_requested = asyncio.Event()
+            bifrost_drain_requests.add(drain_requested)
+            if bifrost_draining:
+                drain_requested.set()
+
+            async def answer_tool_call(tool_call):
+                """Runs a tool call off the receive loop and sends all its responses back in one message."""
+                try:
+                    mjolnir_responses = await mjolnir_executor.execute(tool_call.function_calls)
+                    # Heimdall shows tool results as text, so the serialized responses travel as a JSON string
+                    await downstream_queue.put("text", bifrost_codec.dumps(mjolnir_responses).decode("utf-8"))
+                    await yggdrasil_session.send(mjolnir_responses)
+                    logger.info("Mjolnir wielded: %d responses", len(mjolnir_responses))
+                except Exception as e:
+                    logger.error("Error answering tool call: %s", e)
+
+            async def forward_to_yggdrasil(mime_type, payload):
+                mimir.inc("bifrost_chunks_total", direction="from_heimdall", mime_type=mime_type)
+                mimir.inc("bifrost_bytes_total", len(payload), direction="from_heimdall", mime_type=mime_type)
+                if mime_type == "image/jpeg" and not media_budget.try_take(len(payload)):
+                    mimir.inc("bifrost_throttled_total", mime_type=mime_type, action="dropped")
+                    return
+                if mime_type == "audio/pcm":
+                    delay = media_budget.take(len(payload))
+                    if delay > 0:
+                        # Stop reading from this client until it is back within budget
+                        mimir.inc("bifrost_throttled_total", mime_type=mime_type, action="delayed")
+                        await asyncio.sleep(delay)
+                    for frame in gjallarhorn_gate.feed(payload):
+                        await upstream_queue.put(mime_type, frame)
+                    return
+                if mime_type == "image/jpeg" and not huginn_gate.admit(payload):
+                    return
+                await upstream_queue.put(mime_type, payload)
 
             async def odin_to_yggdrasil():
-                """Transfers messages from Heimdall to Yggdrasil."""
+                """Transfers messages from Heimdall onto the upstream queue, following the client across resumes."""
                 try:
-                    async for heimdall_message in heimdall_connection:
+                    while True:
+                        connection = resumption.connection
                         try:
-                            bifrost_data = json.loads(heimdall_message)
-                            if "realtime_input" in bifrost_data:
-                                for fragment in bifrost_data["realtime_input"]["media_chunks"]:
-                                    if fragment["mime_type"] == "audio/pcm":
-                                        await yggdrasil_session.send({"mime_type": "audio/pcm", "data": fragment["data"]})
-                                        
-                                    elif fragment["mime_type"] == "image/jpeg":
-                                        await yggdrasil_session.send({"mime_type": "image/jpeg", "data": fragment["data"]})
-                                        
-                        except Exception as e:
-                            print(f"Error sending to Yggdrasil: {e}")
-                    print("Heimdall connection closed (send)")
+                            async for heimdall_message in connection:
+                                try:
+                                    for chunk in read_heimdall_message(heimdall_message):
+                                        await forward_to_yggdrasil(chunk.mime_type, chunk.data)
+                                except Exception as e:
+                                    logger.error("Error sending to Yggdrasil: %s", e)
+                        except websockets.exceptions.ConnectionClosedError:
+                            pass
+                        resumption.detach(connection)
+                        if connection.close_code in (1000, 1001):  # the client hung up on purpose
+                            logger.info("Heimdall connection closed (send)")
+                            return
+                        if drain_requested.is_set():
+                            return  # a draining process takes no resumes
+                        logger.info("Heimdall connection dropped; holding the session %.0fs for a resume", resumption.grace)
+                        if not await resumption.wait_for_client():
+                            logger.info("No resume within %.0fs; ending the session", resumption.grace)
+                            return
+                        logger.info("Heimdall resumed the session")
                 except Exception as e:
-                    print(f"Error sending to Yggdrasil: {e}")
+                    logger.error("Error sending to Yggdrasil: %s", e)
                 finally:
-                    print("odin_to_yggdrasil closed")
+                    logger.debug("odin_to_yggdrasil closed")
+
+            async def upstream_sender():
+                """Drains the upstream queue into the Yggdrasil session."""
+                nonlocal last_upstream_audio_at
+                while True:
+                    mime_type, payload = await upstream_queue.get()
+                    try:
+                        sent_at = time.monotonic()
+                        await yggdrasil_session.send({"mime_type": mime_type, "data": payload})
+                        huginn_gate.observe_latency(time.monotonic() - sent_at)
+                        mimir.inc("bifrost_chunks_total", direction="to_yggdrasil", mime_type=mime_type)
+                        mimir.inc("bifrost_bytes_total", len(payload), direction="to_yggdrasil", mime_type=mime_type)
+                        if mime_type == "audio/pcm":
+                            last_upstream_audio_at = sent_at
+                    except Exception as e:
+                        logger.error("Error sending to Yggdrasil: %s", e)
+
+            async def downstream_sender():
+                """Drains the downstream queue into the Heimdall connection."""
+                while True:
+                    kind, payload = await downstream_queue.get()
+                    mimir.inc("bifrost_chunks_total", direction="to_heimdall", mime_type=kind)
+                    mimir.inc("bifrost_bytes_total", len(payload), direction="to_heimdall", mime_type=kind)
+                    envelope = heimdall_envelope(kind, payload, binary_bifrost)
+                    text = kind != "audio/pcm" or not binary_bifrost
+                    connection = resumption.connection
+                    if connection is None:
+                        resumption.buffer(envelope, text)
+                        continue
+                    try:
+                        await connection.send(envelope, text=text)
+                    except websockets.exceptions.ConnectionClosed:
+                        # odin_to_yggdrasil sees the drop as well and waits for the client to resume
+                        resumption.buffer(envelope, text)
 
             async def yggdrasil_to_odin():
                 """Receives divine messages from Yggdrasil and relays them to Heimdall."""
+                nonlocal awaiting_first_audio
                 try:
                     while True:
                         try:
                             async for yggdrasil_response in yggdrasil_session.receive():
                                 if yggdrasil_response.server_content is None:
                                     if yggdrasil_response.tool_call is not None:
-                                        print(f"Tool call received: {yggdrasil_response.tool_call}")
-                                        tool_invocations = yggdrasil_response.tool_call.function_calls
-                                        mjolnir_responses = []
-
-                                        for invocation in tool_invocations:
-                                            mjolnir_name = invocation.name
-                                            mjolnir_args = invocation.args
-                                            invocation_id = invocation.id
-
-                                            if mjolnir_name == "wield_mjolnir":
-                                                try:
-                                                    outcome = wield_mjolnir(int(mjolnir_args["luminosity"]), mjolnir_args["aura_hue"])
-                                                    mjolnir_responses.append(
-                                                        {
-                                                            "name": mjolnir_name,
-                                                            "response": {"result": outcome},
-                                                            "id": invocation_id
-                                                        }
-                                                    )
-                                                    await heimdall_connection.send(json.dumps({"text": json.dumps(mjolnir_responses)}))
-                                                    print("Mjolnir wielded successfully")
-                                                except Exception as e:
-                                                    print(f"Error wielding Mjolnir: {e}")
-                                                    continue
-
-                                        await yggdrasil_session.send(mjolnir_responses)
+                                        logger.info("Tool call received: %s", yggdrasil_response.tool_call)
+                                        mjolnir_task = asyncio.create_task(answer_tool_call(yggdrasil_response.tool_call))
+                                        mjolnir_tasks.add(mjolnir_task)
+                                        mjolnir_task.add_done_callback(mjolnir_tasks.discard)
                                         continue
 
                                 divine_turn = yggdrasil_response.server_content.model_turn
                                 if divine_turn:
+                                    turn_idle.clear()
                                     for fragment in divine_turn.parts:
                                         if hasattr(fragment, 'text') and fragment.text is not None:
-                                            await heimdall_connection.send(json.dumps({"text": fragment.text}))
+                                            await downstream_queue.put("text", fragment.text)
                                         elif hasattr(fragment, 'inline_data') and fragment.inline_data is not None:
-                                            base64_audio = base64.b64encode(fragment.inline_data.data).decode('utf-8')
-                                            await heimdall_connection.send(json.dumps({
-                                                "audio": base64_audio,
-                                            }))
-                                            print("Audio received")
+                                            if awaiting_first_audio and last_upstream_audio_at is not None:
+                                                mimir.observe("bifrost_first_audio_seconds", time.monotonic() - last_upstream_audio_at)
+                                            awaiting_first_audio = False
+                                            await downstream_queue.put("audio/pcm", fragment.inline_data.data)
+                                            logger.info("Audio received", extra=SAMPLED)
 
                                 if yggdrasil_response.server_content.turn_complete:
-                                    print('\n<Turn complete>')
+                                    awaiting_first_audio = True
+                                    turn_idle.set()
+                                    await downstream_queue.put("control", bifrost_codec.dumps({"bifrost": {"turn_complete": True}}))
+                                    logger.info("Turn complete")
                         except websockets.exceptions.ConnectionClosedOK:
-                            print("Heimdall connection closed normally (receive)")
+                            logger.info("Heimdall connection closed normally (receive)")
                             break
                         except Exception as e:
-                            print(f"Error receiving from Yggdrasil: {e}")
+                            logger.error("Error receiving from Yggdrasil: %s", e)
                             break
 
                 except Exception as e:
-                    print(f"Error receiving from Yggdrasil: {e}")
+                    logger.error("Error receiving from Yggdrasil: %s", e)
                 finally:
-                    print("Yggdrasil connection closed (receive)")
+                    logger.debug("Yggdrasil connection closed (receive)")
+
+            async def huginn_advisor():
+                """Sends Heimdall new camera capture settings whenever upstream pressure moves to another tier."""
+                last_hint = None
+                while True:
+                    hint = huginn_gate.capture_hint(len(upstream_queue.items))
+                    if hint != last_hint:
+                        await downstream_queue.put("control", bifrost_codec.dumps({"bifrost": {"camera": hint}}))
+                        logger.info("Huginn capture hint: %s", hint)
+                        last_hint = hint
+                    await asyncio.sleep(HUGINN_HINT_SECONDS)
+
+            async def wind_down():
+                """On shutdown, lets the current turn finish and flushes what Heimdall is still owed."""
+                await drain_requested.wait()
+                if resumption.connection is None:
+                    return  # nobody to finish the turn for, and no one can resume on a draining process
+                logger.info("Bifrost draining: finishing the current turn")
+                await turn_idle.wait()
+                while mjolnir_tasks:
+                    await asyncio.gather(*mjolnir_tasks, return_exceptions=True)
+                await downstream_queue.wait_empty()
 
             odin_task = asyncio.create_task(odin_to_yggdrasil())
             thor_task = asyncio.create_task(yggdrasil_to_odin())
-            await asyncio.gather(odin_task, thor_task)
+            sender_tasks = [
+                asyncio.create_task(upstream_sender()),
+                asyncio.create_task(downstream_sender()),
+                asyncio.create_task(huginn_advisor()),
+            ]
+            drain_task = asyncio.create_task(wind_down())
+            # Either side finishing, the Heimdall sender failing on a closed socket or a finished drain ends the session
+            await asyncio.wait([odin_task, thor_task, sender_tasks[1], drain_task], return_when=asyncio.FIRST_COMPLETED)
+            bifrost_drain_requests.discard(drain_requested)
+            for task in [odin_task, thor_task, *sender_tasks, *mjolnir_tasks, drain_task]:
+                task.cancel()
+            await asyncio.gather(odin_task, thor_task, *sender_tasks, *mjolnir_tasks, drain_task, return_exceptions=True)
+            upstream_queue.discard()
+            downstream_queue.discard()
+            logger.info("Bifrost queues: %s %s", upstream_queue.metrics(), downstream_queue.metrics())
+            logger.info("Huginn frames forwarded=%d dropped=%d", huginn_gate.forwarded, huginn_gate.dropped)
+            logger.info("Gjallarhorn audio frames forwarded=%d gated=%d", gjallarhorn_gate.forwarded, gjallarhorn_gate.gated)
+            logger.info("Bifrost resumes=%d replay dropped=%d", resumption.resumes, resumption.replay_dropped)
+            bifrost_resumable.pop(resumption.token, None)
+            if drain_requested.is_set() and resumption.connection is not None:
+                await resumption.connection.close(1012, "server restarting")  # 1012: reconnect for a new session
+            elif resumption.connection not in (None, heimdall_connection):
+                await resumption.connection.close()  # lets the handler of the resumed connection return
 
+    except BifrostOverloaded as e:
+        logger.warning("Bifrost session rejected (%s), retry after %ds", e.reason, e.retry_after)
+        with contextlib.suppress(websockets.exceptions.ConnectionClosed):
+            await heimdall_connection.send(bifrost_codec.dumps({"bifrost": {"rejected": e.reason, "retry_after": e.retry_after}}), text=True)
+            await heimdall_connection.close(1013, f"retry after {e.retry_after}s")  # 1013: try again later
+    except BifrostAbandoned:
+        logger.info("Heimdall left while waiting for a session slot")
+    except websockets.exceptions.ConnectionClosed:
+        logger.info("Heimdall left before its session started")
     except Exception as e:
-        print(f"Error in Bifrost handler: {e}")
+        logger.error("Error in Bifrost handler: %s", e)
+    finally:
+        heimdall_sessions.discard(heimdall_connection)
+        logger.info("Bifrost session closed.")
+
+def heimdall_gatekeeper(connection, request):
+    """Refuses the WebSocket handshake outright when no session slot or waiting place is left."""
+    if not bifrost_admission.full():
+        return None
+    retry_after = bifrost_admission.reject("handshake").retry_after
+    response = connection.respond(http.HTTPStatus.SERVICE_UNAVAILABLE, "Bifrost is at capacity\n")
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+async def drain_heimdall_sessions(deadline):
+    """Asks every session to wrap up its current turn, then waits until all have ended or `deadline` seconds pass."""
+    global bifrost_draining
+    bifrost_draining = True
+    for drain_requested in list(bifrost_drain_requests):
+        drain_requested.set()
+    waited_until = time.monotonic() + deadline
+    while heimdall_sessions and time.monotonic() < waited_until:
+        await asyncio.sleep(0.1)
+    if heimdall_sessions:
+        logger.warning("Drain deadline reached with %d sessions open; closing them", len(heimdall_sessions))
+        # Resumed sessions are reached through the connection now attached, not the one they started on
+        connections = set(heimdall_sessions)
+        connections.update(resumption.connection for resumption in bifrost_resumable.values() if resumption.connection is not None)
+        await asyncio.gather(*(connection.close(1012, "server restarting") for connection in connections),
+                             return_exceptions=True)
+
+async def report_health(health_queue, worker_id):
+    """Periodically tells the launcher this worker is alive and how busy it is."""
+    while True:
+        health_queue.put_nowait({
+            "worker": worker_id,
+            "pid": os.getpid(),
+            "sessions": len(heimdall_sessions),
+            "reported_at": time.time(),
+        })
+        await asyncio.sleep(BIFROST_HEALTH_INTERVAL)
+
+async def main(reuse_port=False, health_queue=None, worker_id=0, shutdown_signals=(signal.SIGTERM, signal.SIGINT)) -> None:
+    loop = asyncio.get_running_loop()
+    shutdown_signal = loop.create_future()
+    main_task = asyncio.current_task()
+
+    def request_shutdown():
+        if shutdown_signal.done():
+            main_task.cancel()  # a second signal skips the drain
+        else:
+            shutdown_signal.set_result(None)
+
+    for signum in shutdown_signals:
+        with contextlib.suppress(NotImplementedError):  # no signal handlers on Windows event loops
+            loop.add_signal_handler(signum, request_shutdown)
+
+    yggdrasil_pool.prewarm({**YGGDRASIL_WARM_SETUP, "tools": [mjolnir_toolbox]}, count=2)
+    health_task = None
+    mimir_server = await asyncio.start_server(serve_mimir_metrics, BIFROST_HOST, BIFROST_METRICS_PORT + worker_id)
+    try:
+        async with websockets.serve(bifrost_handler, BIFROST_HOST, BIFROST_PORT, reuse_port=reuse_port,
+                                    process_request=heimdall_gatekeeper, max_size=BIFROST_MAX_MESSAGE_BYTES) as bifrost_server:
+            logger.info("BIFROST IS READY TO CONNECT ASGARD AND MIDGARD")
+            if health_queue is not None:
+                health_task = asyncio.create_task(report_health(health_queue, worker_id))
+            await shutdown_signal  # Keep the server running until asked to stop
+            logger.info("Bifrost draining: no longer accepting connections")
+            bifrost_server.close(close_connections=False)
+            await drain_heimdall_sessions(BIFROST_DRAIN_SECONDS)
+    finally:
+        if health_task is not None:
+            health_task.cancel()
+        mimir_server.close()
+        await yggdrasil_pool.close()
+
+def bifrost_worker(worker_id, health_queue):
+    # Ctrl-C reaches the whole process group; only the launcher acts on it, passing one SIGTERM on, so a
+    # worker's single signal starts its drain instead of a second one cutting the drain short
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    log_listener = setup_bifrost_logging()
+    try:
+        asyncio.run(main(reuse_port=True, health_queue=health_queue, worker_id=worker_id, shutdown_signals=(signal.SIGTERM,)))
     finally:
-        print("Bifrost session closed.")
+        log_listener.stop()
 
-async def main() -> None:
-    async with websockets.serve(bifrost_handler, "localhost", 6106):
-        print("BIFROST IS READY TO CONNECT ASGARD AND MIDGARD")
-        await asyncio.Future()  # Keep the server running indefinitely
+def launch_bifrost_workers(worker_count):
+    """Runs `worker_count` Bifrost processes sharing one port through SO_REUSEPORT.
+
+    Dead workers are restarted; workers that stop reporting are flagged. SIGTERM or Ctrl-C is passed on
+    to every worker, which drains its sessions before exiting.
+    """
+    health_queue = multiprocessing.Queue()
+    workers = {}
+    worker_health = {}
+    stopping = False
+
+    def start_worker(worker_id):
+        process = multiprocessing.Process(target=bifrost_worker, args=(worker_id, health_queue), name=f"bifrost-{worker_id}")
+        process.start()
+        logger.info("Bifrost worker %d started (pid %d)", worker_id, process.pid)
+        return process
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    for worker_id in range(worker_count):
+        workers[worker_id] = start_worker(worker_id)
+
+    next_summary = time.monotonic() + BIFROST_HEALTH_INTERVAL
+    while not stopping:
+        try:
+            report = health_queue.get(timeout=1.0)
+            worker_health[report["worker"]] = report
+        except queue.Empty:
+            pass
+
+        for worker_id, process in list(workers.items()):
+            if not process.is_alive() and not stopping:
+                logger.warning("Bifrost worker %d exited with code %s; restarting", worker_id, process.exitcode)
+                worker_health.pop(worker_id, None)
+                workers[worker_id] = start_worker(worker_id)
+
+        if time.monotonic() >= next_summary:
+            next_summary = time.monotonic() + BIFROST_HEALTH_INTERVAL
+            for worker_id in workers:
+                report = worker_health.get(worker_id)
+                if report is None or time.time() - report["reported_at"] > 3 * BIFROST_HEALTH_INTERVAL:
+                    logger.warning("Bifrost worker %d: no recent health report", worker_id)
+                else:
+                    logger.info("Bifrost worker %d (pid %d): %d sessions", worker_id, report["pid"], report["sessions"])
+
+    logger.info("Bifrost launcher stopping: draining workers")
+    for process in workers.values():
+        if process.is_alive():
+            process.terminate()
+    for process in workers.values():
+        process.join(BIFROST_DRAIN_SECONDS + 5)
+        if process.is_alive():
+            process.kill()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Bifrost relay between the browser and Yggdrasil")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes sharing the port (SO_REUSEPORT)")
+    args = parser.parse_args()
+    log_listener = setup_bifrost_logging()
+    try:
+        if args.workers > 1 and hasattr(socket, "SO_REUSEPORT"):
+            launch_bifrost_workers(args.workers)
+        else:
+            if args.workers > 1:
+                logger.warning("SO_REUSEPORT is not available on this platform; running a single Bifrost process")
+            asyncio.run(main())
+    finally:
+        log_listener.stop()
@@ -2,11 +2,21 @@
 
 import asyncio
 import json
+import logging
+import logging.handlers
 import os
+import queue
 import websockets
 from google import genai
 import base64
 
+# Log through a queue so console I/O happens on a listener thread, off the event loop
+log_queue = queue.SimpleQueue()
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s",
+                    handlers=[logging.handlers.QueueHandler(log_queue)])
+log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+logger = logging.getLogger(__name__)
+
 # Load API key from environment
 os.environ['GOOGLE_API_KEY'] = ''
 MODEL = "gemini-2.0-flash-exp"  # use your model ID
@@ -64,7 +74,7 @@ async def gemini_session_handler(client_websocket: websockets.WebSocketServerPro
         config["tools"] = [tool_set_light_values]
         
         async with client.aio.live.connect(model=MODEL, config=config) as session:
-            print("Connected to Gemini API")
+            logger.info("Connected to Gemini API")
 
             async def send_to_gemini():
                 """Sends messages from the client websocket to the Gemini API."""
@@ -81,12 +91,12 @@ async def gemini_session_handler(client_websocket: websockets.WebSocketServerPro
                                       await session.send({"mime_type": "image/jpeg", "data": chunk["data"]})
                                       
                       except Exception as e:
-                          print(f"Error sending to Gemini: {e}")
-                  print("Client connection closed (send)")
+                          logger.error("Error sending to Gemini: %s", e)
+                  logger.info("Client connection closed (send)")
                 except Exception as e:
-                     print(f"Error sending to Gemini: {e}")
+                     logger.error("Error sending to Gemini: %s", e)
                 finally:
-                   print("send_to_gemini closed")
+                   logger.debug("send_to_gemini closed")
 
 
 
@@ -95,14 +105,14 @@ async def gemini_session_handler(client_websocket: websockets.WebSocketServerPro
                 try:
                     while True:
                         try:
-                            print("receiving from gemini")
+                            logger.debug("receiving from gemini")
                             async for response in session.receive():
                                 #first_response = True
                                 #print(f"response: {response}")
                                 if response.server_content is None:
                                     if response.tool_call is not None:
                                           #handle the tool call
-                                           print(f"Tool call received: {response.tool_call}")
+                                           logger.info("Tool call received: %s", response.tool_call)
 
                                            function_calls = response.tool_call.function_calls
                                            function_responses = []
@@ -126,14 +136,14 @@ async def gemini_session_handler(client_websocket: websockets.WebSocketServerPro
                                                              }
                                                           ) 
                                                           await client_websocket.send(json.dumps({"text": json.dumps(function_responses)}))
-                                                          print("Function executed")
+                                                          logger.info("Function executed")
                                                       except Exception as e:
-                                                          print(f"Error executing function: {e}")
+                                                          logger.error("Error executing function: %s", e)
                                                           continue
 
 
                                            # Send function response back to Gemini
-                                           print(f"function_responses: {function_responses}")
+                                           logger.info("function_responses: %s", function_responses)
                                            await session.send(function_responses)
                                            continue
 
@@ -155,21 +165,21 @@ async def gemini_session_handler(client_websocket: websockets.WebSocketServerPro
                                             await client_websocket.send(json.dumps({
                                                 "audio": base64_audio,
                                             }))
-                                            print("audio received")
+                                            logger.debug("audio received")
 
                                 if response.server_content.turn_complete:
-                                    print('\n<Turn complete>')
+                                    logger.info('<Turn complete>')
                         except websockets.exceptions.ConnectionClosedOK:
-                            print("Client connection closed normally (receive)")
+                            logger.info("Client connection closed normally (receive)")
                             break  
                         except Exception as e:
-                            print(f"Error receiving from Gemini: {e}")
+                            logger.error("Error receiving from Gemini: %s", e)
                             break 
 
                 except Exception as e:
-                      print(f"Error receiving from Gemini: {e}")
+                      logger.error("Error receiving from Gemini: %s", e)
                 finally:
-                      print("Gemini connection closed (receive)")
+                      logger.info("Gemini connection closed (receive)")
 
 
             
@@ -180,16 +190,20 @@ async def gemini_session_handler(client_websocket: websockets.WebSocketServerPro
 
 
     except Exception as e:
-        print(f"Error in Gemini session: {e}")
+        logger.error("Error in Gemini session: %s", e)
     finally:
-        print("Gemini session closed.")
+        logger.info("Gemini session closed.")
 
 
 async def main() -> None:
     async with websockets.serve(gemini_session_handler, "localhost", 9082):
-        print("Running websocket server localhost:9082...")
+        logger.info("Running websocket server localhost:9082...")
         await asyncio.Future()  
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    log_listener.start()
+    try:
+        asyncio.run(main())
+    finally:
+        log_listener.stop()
@@ -1,8 +1,13 @@
+import logging
 import time
 from PIL import Image
 import moondream as md
 from groq import Groq
 
+# Configure logging for the console session
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
 # Global variables to manage chatbot mode and history
 chatbot_mode = "image_analysis"  # Default mode
 conversation_history = []        # Stores previous inputs
@@ -11,9 +16,9 @@ last_caption = None              # Store the last image caption
 # Initialize and load the visual model
 try:
     model = md.vl(model="F://bmsit//trial//moondream-0_5b-int8.mf")
-    print("Model loaded successfully!")
+    logger.info("Model loaded successfully!")
 except Exception as e:
-    print("Error loading model:", e)
+    logger.error("Error loading model: %s", e)
     exit()
 
 # Initialize Groq client
@@ -21,14 +26,14 @@ client = Groq(api_key="")
 
 def process_image(image_path):
     try:
-        print(f"Attempting to open image: {image_path}")  # Debugging print
+        logger.debug("Attempting to open image: %s", image_path)
         image = Image.open(image_path).resize((224, 224))
         encoded_image = model.encode_image(image)
         caption = model.caption(encoded_image)["caption"]
-        print(f"Caption: {caption}")
+        logger.info("Caption: %s", caption)
         return caption
     except Exception as e:
-        print(f"Error processing image: {e}")
+        logger.error("Error processing image: %s", e)
         return None
 
 def image_analysis_response(user_input):
@@ -66,7 +71,7 @@ def image_analysis_response(user_input):
         return reply
 
     except Exception as e:
-        print(f"Chatbot: Oops, something went wrong! {e}")
+        logger.error("Chatbot: Oops, something went wrong! %s", e)
         return "I'm sorry, I encountered an error while processing your request."
 
 def general_chatbot_response(user_input):
@@ -99,7 +104,7 @@ def general_chatbot_response(user_input):
         return reply
 
     except Exception as e:
-        print(f"Chatbot: Oops, something went wrong! {e}")
+        logger.error("Chatbot: Oops, something went wrong! %s", e)
         return "I'm sorry, I encountered an error while processing your request."
 
 def image_analysis_mode(image_path):
@@ -111,55 +116,54 @@ def image_analysis_mode(image_path):
         if caption:
             last_caption = caption  # Save the last caption
             user_input = caption
-            print(f"You: {user_input}")
+            logger.info("You: %s", user_input)
 
             reply = image_analysis_response(user_input)
-            print(f"Chatbot: {reply}\n")
+            logger.info("Chatbot: %s", reply)
         else:
-            print("[Error] Unable to process the image. Exiting Image Analysis Mode.")
+            logger.error("[Error] Unable to process the image. Exiting Image Analysis Mode.")
             return
 
         # Wait for 10 seconds before prompting
-        for remaining in range(10, 0, -1):
-            print(f"[System] Next prompt in {remaining} seconds...", end='\r')
-            time.sleep(1)
+        logger.info("[System] Next prompt in 10 seconds...")
+        time.sleep(10)
 
         # Prompt the user for input to potentially switch modes
-        print("\n[System] Type 'hold' to switch to General Chatbot Mode or press Enter to continue in Image Analysis Mode.")
+        logger.info("[System] Type 'hold' to switch to General Chatbot Mode or press Enter to continue in Image Analysis Mode.")
         user_command = input("Command: ").strip().lower()
 
         if user_command == "hold":
-            print("Switching to General Chatbot Mode.\n")
+            logger.info("Switching to General Chatbot Mode.")
             chatbot_mode = "general_chatbot"
             general_chatbot_mode()
         else:
-            print("Continuing in Image Analysis Mode.\n")
+            logger.info("Continuing in Image Analysis Mode.")
 
 def general_chatbot_mode():
     global chatbot_mode
 
-    print("General Chatbot Mode Activated. Type 'SEE' to switch back to Image Analysis Mode or 'exit' to terminate the session.")
+    logger.info("General Chatbot Mode Activated. Type 'SEE' to switch back to Image Analysis Mode or 'exit' to terminate the session.")
     while True:
         user_input = input("You: ").strip()
         if user_input.lower() == 'exit':
-            print("Chatbot: Goodbye! Have a great day!")
+            logger.info("Chatbot: Goodbye! Have a great day!")
             exit()
         elif user_input.lower() == 'see':
-            print("Switching back to Image Analysis Mode.\n")
+            logger.info("Switching back to Image Analysis Mode.")
             chatbot_mode = "image_analysis"
             image_analysis_mode("F://bmsit//trial//n.jpg")  # Update with your actual image path
             break
         else:
             reply = general_chatbot_response(user_input)
-            print(f"Chatbot: {reply}\n")
+            logger.info("Chatbot: %s", reply)
 
 def main():
     # Initial prompt
-    print("Chatbot: Hello! Let me assist you with the image analysis. (type 'exit' to end the session)")
+    logger.info("Chatbot: Hello! Let me assist you with the image analysis. (type 'exit' to end the session)")
     image_analysis_mode("F://bmsit//trial//n.jpg")  # Update with your actual image path
 
 if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
-        print("\nChatbot: Session terminated by user.")
+        logger.info("Chatbot: Session terminated by user.")
@@ -1,9 +1,14 @@
+import logging
 import time
 from PIL import Image
 import moondream as md
 from groq import Groq
 import pyttsx3  # Text-to-Speech library
 
+# Configure logging for the console session
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
 # Global variables to manage chatbot mode and history
 chatbot_mode = "image_analysis"  # Default mode
 conversation_history = []        # Stores previous inputs
@@ -12,9 +17,9 @@ last_caption = None              # Store the last image caption
 # Initialize and load the visual model
 try:
     model = md.vl(model="F://bmsit//trial//moondream-0_5b-int8.mf")
-    print("Model loaded successfully!")
+    logger.info("Model loaded successfully!")
 except Exception as e:
-    print("Error loading model:", e)
+    logger.error("Error loading model: %s", e)
     exit()
 
 # Initialize Groq client
@@ -30,14 +35,14 @@ def voice_output(message):
 
 def process_image(image_path):
     try:
-        print(f"Attempting to open image: {image_path}")  # Debugging print
+        logger.debug("Attempting to open image: %s", image_path)
         image = Image.open(image_path).resize((224, 224))
         encoded_image = model.encode_image(image)
         caption = model.caption(encoded_image)["caption"]
-        print(f"Caption: {caption}")
+        logger.info("Caption: %s", caption)
         return caption
     except Exception as e:
-        print(f"Error processing image: {e}")
+        logger.error("Error processing image: %s", e)
         return None
 
 def image_analysis_response(user_input):
@@ -76,17 +81,17 @@ def image_analysis_response(user_input):
         conversation_history.append({"role": "assistant", "content": reply})
 
         # Print the response
-        print(f"Chatbot: {reply}")
+        logger.info("Chatbot: %s", reply)
 
         # Trigger voice warning only if obstacle is detected
         if "Yes, there are obstacles" in reply:
-            print("Voice Warning: Stop!")
+            logger.warning("Voice Warning: Stop!")
             voice_output("Stop! There are obstacles ahead.")
         
         return reply
 
     except Exception as e:
-        print(f"Chatbot: Oops, something went wrong! {e}")
+        logger.error("Chatbot: Oops, something went wrong! %s", e)
         return "I'm sorry, I encountered an error while processing your request."
 
 def general_chatbot_response(user_input):
@@ -118,19 +123,19 @@ def general_chatbot_response(user_input):
         conversation_history.append({"role": "assistant", "content": reply})
 
         # Print and speak the response (only in General Chatbot Mode)
-        print(f"Chatbot: {reply}")
+        logger.info("Chatbot: %s", reply)
         voice_output(reply)
 
         return reply
 
     except Exception as e:
-        print(f"Chatbot: Oops, something went wrong! {e}")
+        logger.error("Chatbot: Oops, something went wrong! %s", e)
         return "I'm sorry, I encountered an error while processing your request."
 
 def image_analysis_mode(image_path):
     global chatbot_mode, last_caption
 
-    print("Switching to Image Analysis Mode.")
+    logger.info("Switching to Image Analysis Mode.")
 
     while True:
         # Process the image and generate caption
@@ -138,57 +143,56 @@ def image_analysis_mode(image_path):
         if caption:
             last_caption = caption  # Save the last caption
             user_input = caption
-            print(f"You: {user_input}")
+            logger.info("You: %s", user_input)
 
             reply = image_analysis_response(user_input)
-            print(f"Chatbot: {reply}\n")
+            logger.info("Chatbot: %s", reply)
         else:
-            print("[Error] Unable to process the image. Exiting Image Analysis Mode.")
+            logger.error("[Error] Unable to process the image. Exiting Image Analysis Mode.")
             return
 
         # Wait for 10 seconds before prompting
-        for remaining in range(10, 0, -1):
-            print(f"[System] Next prompt in {remaining} seconds...", end='\r')
-            time.sleep(1)
+        logger.info("[System] Next prompt in 10 seconds...")
+        time.sleep(10)
 
         # Prompt the user for input to potentially switch modes
-        print("\n[System] Type 'hold' to switch to General Chatbot Mode or press Enter to continue in Image Analysis Mode.")
+        logger.info("[System] Type 'hold' to switch to General Chatbot Mode or press Enter to continue in Image Analysis Mode.")
         user_command = input("Command: ").strip().lower()
 
         if user_command == "hold":
-            print("Switching to General Chatbot Mode.\n")
+            logger.info("Switching to General Chatbot Mode.")
             voice_output("Switching to General Chatbot Mode.")
             chatbot_mode = "general_chatbot"
             general_chatbot_mode()
         else:
-            print("Continuing in Image Analysis Mode.\n")
+            logger.info("Continuing in Image Analysis Mode.")
 
 def general_chatbot_mode():
     global chatbot_mode
 
-    print("General Chatbot Mode Activated.")
+    logger.info("General Chatbot Mode Activated.")
     voice_output("General Chatbot Mode Activated.")
 
-    print("Type 'SEE' to switch back to Image Analysis Mode or 'exit' to terminate the session.")
+    logger.info("Type 'SEE' to switch back to Image Analysis Mode or 'exit' to terminate the session.")
     while True:
         user_input = input("You: ").strip()
         if user_input.lower() == 'exit':
-            print("Chatbot: Goodbye! Have a great day!")
+            logger.info("Chatbot: Goodbye! Have a great day!")
             voice_output("Goodbye! Have a great day!")
             exit()
         elif user_input.lower() == 'see':
-            print("Switching back to Image Analysis Mode.\n")
+            logger.info("Switching back to Image Analysis Mode.")
             chatbot_mode = "image_analysis"
             image_analysis_mode("F://bmsit//trial//n.jpg")  # Update with your actual image path
             break
         else:
             reply = general_chatbot_response(user_input)
-            print(f"Chatbot: {reply}\n")
+            logger.info("Chatbot: %s", reply)
 
 def main():
     # Initial prompt with voice output
     welcome_message = "Hello! Let me assist you with the image analysis. Type 'exit' to end the session."
-    print(f"Chatbot: {welcome_message}")
+    logger.info("Chatbot: %s", welcome_message)
     voice_output(welcome_message)
     image_analysis_mode("F://bmsit//b.jpg")  # Update with your actual image path
 
@@ -196,5 +200,5 @@ if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
-        print("\nChatbot: Session terminated by user.")
+        logger.info("Chatbot: Session terminated by user.")
         voice_output("Session terminated. Goodbye!")
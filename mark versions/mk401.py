@@ -1,3 +1,11 @@
+import collections
+import concurrent.futures
+import logging
+import os
+import queue
+import re
+import sys
+import threading
 import time
 from PIL import Image
 import moondream as md
@@ -5,215 +13,624 @@ from groq import Groq
 import pyttsx3  # Text-to-Speech library
 import speech_recognition as sr  # Speech-to-Text library
 
+# Configure logging for the console session
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
 # Global variables to manage chatbot mode and history
 chatbot_mode = "image_analysis"  # Default mode
 conversation_history = []        # Stores previous inputs
 last_caption = None              # Store the last image caption
+last_guided_caption = None       # Scene whose obstacle guidance was last spoken
 
 # Initialize and load the visual model
 try:
     model = md.vl(model="F://bmsit//trial//moondream-0_5b-int8.mf")
-    print("Model loaded successfully!")
+    logger.info("Model loaded successfully!")
 except Exception as e:
-    print("Error loading model:", e)
+    logger.error("Error loading model: %s", e)
     exit()
 
 # Initialize Groq client
 client = Groq(api_key="")
 
-# Initialize TTS engine
-tts_engine = pyttsx3.init()
-
 # Initialize Speech Recognizer
 recognizer = sr.Recognizer()
 
-def voice_output(message):
-    """Generates a voice output."""
-    tts_engine.say(message)
-    tts_engine.runAndWait()
+# Perception pipeline: capture -> caption -> reason -> speak, each stage on its own thread.
+# Stage queues are small and drop their oldest entry when full, so every stage works on the freshest input.
+CAPTURE_INTERVAL = 1.0  # seconds between frames read from the camera image
+FRAME_QUEUE_SIZE = 1  # per camera
+# Caption batching: requests from all cameras arriving within BATCH_WINDOW seconds are captioned together
+BATCH_WINDOW = 0.05
+BATCH_MAX_FRAMES = 8
+CAPTION_QUEUE_SIZE = 1
+SPEECH_QUEUE_SIZE = 2
+# Seconds a warning may wait to be spoken, counted from when its evidence appeared: the frame's capture for a
+# caption-scored warning, the sentence for one from the language model. Past that it describes a scene the user
+# has left. Guidance that follows a warning is never dropped.
+WARNING_MAX_AGE = 3.0
+
+# Fast obstacle path: each caption is scored locally as soon as it exists, so "Stop!" never waits on the language
+# model; the model's reply follows as guidance. Drops underfoot score on their own; vehicles, furniture and people
+# only when the caption puts them in front of the viewer or in the path, since captions describe where things sit
+# relative to each other far more often than relative to the user.
+OBSTACLE_WORDS = {
+    "stairs": 1.0, "staircase": 1.0, "steps": 1.0, "hole": 1.0, "curb": 1.0,
+    "car": 0.7, "cars": 0.7, "truck": 0.7, "bus": 0.7, "motorcycle": 0.7, "bicycle": 0.7, "bike": 0.7, "scooter": 0.7,
+    "wall": 0.7, "door": 0.7, "pole": 0.7, "pillar": 0.7, "post": 0.7, "tree": 0.7, "fence": 0.7, "barrier": 0.7,
+    "cone": 0.7, "glass": 0.7, "chair": 0.6, "chairs": 0.6, "table": 0.6, "desk": 0.6, "bench": 0.6, "sofa": 0.6,
+    "couch": 0.6, "bed": 0.6, "box": 0.6, "boxes": 0.6, "bin": 0.6, "trash": 0.6, "person": 0.6, "people": 0.6,
+    "man": 0.6, "woman": 0.6, "child": 0.6, "dog": 0.6, "cat": 0.6,
+}
+NEAR_WORDS = re.compile(r"\b(?:(?:right |directly )?in front of (?:you|the (?:camera|viewer))|in (?:your|the) (?:way|path)"
+                        r"|blocking|close-up|close up|foreground)\b")
+# Objects shown in a picture, on a sign or on a screen are not in the way
+DEPICTED = re.compile(r"\b(?:poster|picture|painting|photo|photograph|drawing|image|sign|screen|television|tv|toy|model|reflection)s?"
+                      r" of (?:an? |the |some |two |several )?[a-z]+")
+NEAR_BONUS = 0.3
+OBSTACLE_RISK_THRESHOLD = 0.8
+# The model is told how to answer, but its wording varies between prompts ("No, it is safe" in one, "Yes, it is
+# safe" in another), so its reply is read for the meaning rather than for one exact sentence
+OBSTACLE_REPLY = re.compile(r"\b(?:there (?:are|is) (?:an? |some |several )?obstacles?|obstacles? (?:ahead|in (?:your|the) (?:path|way)))\b", re.IGNORECASE)
+# Clear means the go-ahead or obstacles negated anywhere in the sentence; "safe to move left" is not clear
+CLEAR_REPLY = re.compile(r"\bsafe to (?:move|proceed|go|walk|continue) (?:forward|ahead|straight)\b"
+                         r"|\bno (?:visible |apparent )?obstacles?\b|\bfree of obstacles\b|\bwithout (?:any )?obstacles\b"
+                         r"|\b(?:don't|do not|doesn't|does not|can't|cannot) (?:see|appear|seem|notice|detect)\b[^.!?]*\bobstacles?\b"
+                         r"|\bnot (?:see|notice|detect) any obstacles?\b", re.IGNORECASE)
+# A way to move around something; "go right ahead" is a go-ahead, not a direction
+DIRECTION_WORDS = re.compile(r"\b(?:move|step|go|turn|walk|veer|head|shift|keep|stay)\s+(?:to\s+(?:the|your)\s+)?"
+                             r"(?:left|right|backwards?|back|aside|around)\b(?!\s+ahead)", re.IGNORECASE)
+OBSTACLE_WARNING = "Stop! There are obstacles ahead."
+
+caption_queue = queue.Queue(maxsize=CAPTION_QUEUE_SIZE)  # (captured_at, caption, warned)
+speech_queue = queue.Queue(maxsize=SPEECH_QUEUE_SIZE)    # (captured_at of a warning or None, message)
+analysis_active = threading.Event()  # cleared while the user is in General Chatbot Mode
+conversation_lock = threading.Lock()  # conversation_history is shared by the reason stage and the console
+pipeline_threads = []
+
+def offer(stage_queue, item):
+    """Puts `item` on a stage queue, discarding the oldest entry when the queue is full."""
+    while True:
+        try:
+            stage_queue.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                stage_queue.get_nowait()
+                stage_queue.task_done()
+            except queue.Empty:
+                pass
+
+# Moondream cache: a frame is recognised by its file's mtime/size first and by perceptual hash otherwise, so an
+# unchanged scene reuses its encoding and caption. Least recently used entries go once FRAME_CACHE_BYTES is exceeded.
+FRAME_CACHE_BYTES = 64 * 1024 * 1024
+FRAME_HASH_SIZE = 16
+# Hash bits two frames may differ by and still share an entry; kept tight because a reused caption could hide a new obstacle
+FRAME_MATCH_BITS = 2
+
+model_lock = threading.Lock()  # the caption stage and console questions share one model
+
+# Replies are streamed and spoken a sentence at a time; a sentence ends at . ! or ? followed by a new sentence
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'])")
+
+def voice_output(message, captured_at=None, urgent=False):
+    """Queues a voice output; the speak stage says it as soon as it is free.
+
+    Urgent messages push out the oldest queued message when the queue is full; anything else waits for room, so
+    no sentence of a reply is lost. Warnings carry `captured_at`, when their evidence appeared, and are dropped
+    once that is more than WARNING_MAX_AGE ago.
+    """
+    if urgent:
+        offer(speech_queue, (captured_at, message))
+    else:
+        speech_queue.put((captured_at, message))
+
+def stream_sentences(completion):
+    """Yields each sentence of a streamed chat completion as soon as it is complete."""
+    pending = ""
+    for chunk in completion:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if not delta:
+            continue
+        pending += delta
+        *sentences, pending = SENTENCE_BREAK.split(pending)
+        for sentence in sentences:
+            yield sentence.strip()
+    if pending.strip():
+        yield pending.strip()
+
+def wait_for_speech():
+    """Blocks until everything queued for speaking has been said."""
+    if pipeline_threads:
+        speech_queue.join()
 
 def audio_input():
     """Captures audio input from the microphone and converts it to text."""
+    wait_for_speech()  # don't let the microphone pick up our own voice
     with sr.Microphone() as source:
-        print("Listening...")
+        logger.info("Listening...")
         try:
             audio = recognizer.listen(source, timeout=5, phrase_time_limit=10)
             text = recognizer.recognize_google(audio)
-            print(f"You (Audio): {text}")
+            logger.info("You (Audio): %s", text)
             return text
         except sr.UnknownValueError:
-            print("Sorry, I could not understand the audio.")
+            logger.warning("Sorry, I could not understand the audio.")
             voice_output("Sorry, I could not understand the audio.")
             return None
         except sr.RequestError as e:
-            print(f"Speech recognition error: {e}")
+            logger.error("Speech recognition error: %s", e)
             return None
         except Exception as e:
-            print(f"An error occurred: {e}")
+            logger.error("An error occurred: %s", e)
             return None
 
-def process_image(image_path):
+def load_frame(image_path):
+    logger.debug("Attempting to open image: %s", image_path)
+    with Image.open(image_path) as image:
+        return image.resize((224, 224))
+
+def frame_hash(image):
+    """Difference hash of a frame, as an int with FRAME_HASH_SIZE**2 bits."""
+    pixels = list(image.convert("L").resize((FRAME_HASH_SIZE + 1, FRAME_HASH_SIZE), Image.BILINEAR).getdata())
+    bits = 0
+    for row in range(FRAME_HASH_SIZE):
+        for column in range(FRAME_HASH_SIZE):
+            index = row * (FRAME_HASH_SIZE + 1) + column
+            bits = (bits << 1) | (pixels[index + 1] > pixels[index])
+    return bits
+
+def approximate_bytes(value):
+    """Rough memory held by an encoding: array buffers where they exist, object sizes otherwise."""
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple)):
+        return sum(approximate_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(approximate_bytes(item) for item in value.values())
+    if hasattr(value, "__dict__"):
+        return sum(approximate_bytes(item) for item in vars(value).values())
+    return sys.getsizeof(value)
+
+class FrameEntry:
+    """One distinct frame: its pixels until encoded, then its encoding and caption."""
+
+    def __init__(self, hash_bits, image):
+        self.hash_bits = hash_bits
+        self.image = image
+        self.encoded = None
+        self.caption = None
+        self.size = image.width * image.height * len(image.getbands())
+
+class FrameCache:
+    """Moondream encodings and captions keyed by frame content, bounded by `max_bytes`."""
+
+    def __init__(self, max_bytes=FRAME_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()  # hash bits -> FrameEntry, least recently used first
+        self.file_signatures = {}  # image path -> ((mtime, size), hash bits)
+        self.size = 0
+        self.latest = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def lookup(self, image_path):
+        """Returns the entry for the frame now at `image_path`, adding one if the scene is new."""
+        stat = os.stat(image_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            known = self.file_signatures.get(image_path)
+            if known is not None and known[0] == signature and known[1] in self.entries:
+                return self.use(self.entries[known[1]])
+
+        image = load_frame(image_path)
+        hash_bits = frame_hash(image)
+        with self.lock:
+            entry = self.entries.get(hash_bits)
+            if entry is None:
+                entry = next((candidate for candidate in self.entries.values()
+                              if (candidate.hash_bits ^ hash_bits).bit_count() <= FRAME_MATCH_BITS), None)
+            self.file_signatures[image_path] = (signature, entry.hash_bits if entry else hash_bits)
+            if entry is not None:
+                return self.use(entry)
+            self.misses += 1
+            entry = FrameEntry(hash_bits, image)
+            self.entries[hash_bits] = entry
+            self.size += entry.size
+            self.latest = entry
+            self.evict()
+            return entry
+
+    def use(self, entry):
+        """Marks `entry` most recently used. Call with the lock held."""
+        self.hits += 1
+        self.latest = entry
+        if entry.hash_bits in self.entries:
+            self.entries.move_to_end(entry.hash_bits)
+        return entry
+
+    def resize(self, entry, size):
+        """Records a new memory estimate for `entry` and evicts as needed."""
+        with self.lock:
+            if entry.hash_bits in self.entries:
+                self.size += size - entry.size
+            entry.size = size
+            self.evict()
+
+    def evict(self):
+        """Drops least recently used entries past `max_bytes`, never the newest one. Call with the lock held."""
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= evicted.size
+
+frame_cache = FrameCache()
+
+def encode_frame(entry):
+    """The moondream encoding of a frame, computed once per distinct frame."""
+    with model_lock:
+        if entry.encoded is None:
+            entry.encoded = model.encode_image(entry.image)
+            entry.image = None
+            frame_cache.resize(entry, approximate_bytes(entry.encoded))
+        return entry.encoded
+
+def caption_batch(entries):
+    """Captions several frames in one hold of the model; each distinct frame is encoded and captioned once.
+
+    Returns one caption (or None on error) per entry, in order.
+    """
+    pending = list({id(entry): entry for entry in entries if entry.caption is None}.values())
+    if pending:
+        with model_lock:
+            for entry in pending:
+                try:
+                    if entry.encoded is None:
+                        entry.encoded = model.encode_image(entry.image)
+                        entry.image = None
+                        frame_cache.resize(entry, approximate_bytes(entry.encoded))
+                    entry.caption = model.caption(entry.encoded)["caption"]
+                except Exception as e:
+                    logger.error("Error processing image: %s", e)
+    for entry in entries:
+        if entry.caption is not None:
+            logger.info("Caption: %s", entry.caption)
+    return [entry.caption for entry in entries]
+
+class CaptionBatcher:
+    """Collects caption requests from every camera for up to `window` seconds and captions them as one batch.
+
+    `submit` returns a future per frame, so each caller gets back the caption of the frame it sent.
+    """
+
+    def __init__(self, window=BATCH_WINDOW, max_frames=BATCH_MAX_FRAMES):
+        self.window = window
+        self.max_frames = max_frames
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.frames = 0
+
+    def submit(self, entry):
+        future = concurrent.futures.Future()
+        if entry.caption is not None:
+            future.set_result(entry.caption)  # cached; no need to wait for a batch
+        else:
+            self.requests.put((entry, future))
+        return future
+
+    def run(self):
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_frames:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait())
+                except queue.Empty:
+                    break
+            captions = caption_batch([entry for entry, _ in batch])
+            self.batches += 1
+            self.frames += len(batch)
+            logger.debug("Captioned a batch of %d frames", len(batch))
+            for (_, future), caption in zip(batch, captions):
+                future.set_result(caption)
+
+caption_batcher = CaptionBatcher()
+
+def ask_about_frame(question):
+    """Answers a question about the latest frame, reusing its cached encoding."""
+    entry = frame_cache.latest
+    if entry is None:
+        return None
     try:
-        print(f"Attempting to open image: {image_path}")  # Debugging print
-        image = Image.open(image_path).resize((224, 224))
-        encoded_image = model.encode_image(image)
-        caption = model.caption(encoded_image)["caption"]
-        print(f"Caption: {caption}")
-        return caption
+        encoded_image = encode_frame(entry)
+        with model_lock:
+            return model.query(encoded_image, question)["answer"]
     except Exception as e:
-        print(f"Error processing image: {e}")
+        logger.error("Error answering about the image: %s", e)
         return None
 
-def image_analysis_response(user_input):
-    global conversation_history
+def obstacle_risk(caption):
+    """Scores a caption from 0 to 1 for an obstacle in the user's path, without leaving the machine."""
+    text = DEPICTED.sub("", caption.lower())
+    risk = max((OBSTACLE_WORDS.get(word, 0.0) for word in re.findall(r"[a-z]+", text)), default=0.0)
+    if risk and NEAR_WORDS.search(text):
+        risk += NEAR_BONUS
+    return min(risk, 1.0)
+
+def reply_is_clear(sentence):
+    """Whether a sentence of the model's reply says the way ahead is clear."""
+    # A sentence naming a way to move is guidance around an obstacle, never an all-clear
+    return bool(CLEAR_REPLY.search(sentence)) and not DIRECTION_WORDS.search(sentence)
+
+def reply_reports_obstacle(sentence):
+    """Whether a sentence of the model's reply says there is something in the way."""
+    return bool(OBSTACLE_REPLY.search(sentence)) and not reply_is_clear(sentence)
+
+def image_analysis_response(user_input, warned=False):
+    """Asks the model about a scene; obstacle warnings are spoken, followed by the model's guidance.
+
+    `warned` means the fast path has already said "Stop!" for this scene. Guidance is spoken once per scene,
+    however many frames of it are captioned.
+    """
+    global conversation_history, last_guided_caption
+
+    with conversation_lock:
+        # Clear history to retain only the last conversation
+        conversation_history = [
+            {
+                "role": "system",
+                "content": (
+                    "You are now a visual assistant with OCR capability for a visually impaired person. "
+                    "I will describe the environment to you and perform OCR to extract any visible text from the image. "
+                    "Your task is to determine if there are any obstacles in the person's path and read any visible text. "
+                    "If there are obstacles, identify them and suggest a safe direction to move (e.g., 'left,' 'right,' 'backward'). "
+                    "If it is safe to proceed forward, respond with 'No, it is safe to move forward.' If text is present in the image, read it out loud. "
+                    "Always think from the perspective of someone walking and using OCR for navigation assistance."
+                )
+            }
+        ]
+        # Add the user input to the conversation
+        conversation_history.append({"role": "user", "content": user_input})
 
-    # Clear history to retain only the last conversation
-    conversation_history = [
-        {
-            "role": "system",
-            "content": (
-                "You are now a visual assistant with OCR capability for a visually impaired person. "
-                "I will describe the environment to you and perform OCR to extract any visible text from the image. "
-                "Your task is to determine if there are any obstacles in the person's path and read any visible text. "
-                "If there are obstacles, identify them and suggest a safe direction to move (e.g., 'left,' 'right,' 'backward'). "
-                "If it is safe to proceed forward, respond with 'No, it is safe to move forward.' If text is present in the image, read it out loud. "
-                "Always think from the perspective of someone walking and using OCR for navigation assistance."
+        try:
+            completion = client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=conversation_history,
+                temperature=1,
+                max_tokens=1024,
+                top_p=1,
+                stream=True,
+                stop=None,
             )
-        }
-    ]
-    # Add the user input to the conversation
-    conversation_history.append({"role": "user", "content": user_input})
 
-    try:
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=conversation_history,
-            temperature=1,
-            max_tokens=1024,
-            top_p=1,
-            stream=False,
-            stop=None,
-        )
-
-        # Extract the assistant's response
-        reply = completion.choices[0].message.content.strip()
-        conversation_history.append({"role": "assistant", "content": reply})
-
-        # Print the response
-        print(f"Chatbot: {reply}")
-
-        # Trigger voice warning only if obstacle is detected
-        if "Yes, there are obstacles" in reply:
-            print("Voice Warning: Stop!")
-            voice_output("Stop! There are obstacles ahead.")
+            # Read the reply as it streams in; the warning goes out with the first sentence that calls for it
+            sentences = []
+            for sentence in stream_sentences(completion):
+                sentences.append(sentence)
+                # Trigger voice warning only if obstacle is detected
+                if not warned and reply_reports_obstacle(sentence):
+                    warned = True
+                    logger.warning("Voice Warning: Stop!")
+                    # Aged from this sentence: the caption and Groq round trip already used up time since capture
+                    voice_output(OBSTACLE_WARNING, time.monotonic(), urgent=True)
+                # Once warned, the rest of the reply tells the user what is there and which way to go; an
+                # all-clear would contradict the "Stop!" just spoken, so it is left out
+                if warned and user_input != last_guided_caption and not reply_is_clear(sentence):
+                    voice_output(sentence)
+            if warned:
+                last_guided_caption = user_input
+            reply = " ".join(sentences)
+            conversation_history.append({"role": "assistant", "content": reply})
+
+            # Print the response
+            logger.info("Chatbot: %s", reply)
         
-        return reply
+            return reply
 
-    except Exception as e:
-        print(f"Chatbot: Oops, something went wrong! {e}")
-        return "I'm sorry, I encountered an error while processing your request."
+        except Exception as e:
+            logger.error("Chatbot: Oops, something went wrong! %s", e)
+            return "I'm sorry, I encountered an error while processing your request."
 
 def general_chatbot_response(user_input):
     global conversation_history
 
-    # Retain the last conversation (keep last_caption in memory)
-    if last_caption:
-        conversation_history = [
-            {"role": "system", "content": "You are a friendly and helpful chatbot."},
-            {"role": "user", "content": f"I just saw an image that said: {last_caption}"}
-        ]
+    with conversation_lock:
+        # Retain the last conversation (keep last_caption in memory)
+        if last_caption:
+            conversation_history = [
+                {"role": "system", "content": "You are a friendly and helpful chatbot."},
+                {"role": "user", "content": f"I just saw an image that said: {last_caption}"}
+            ]
 
-    # Add the user input to the conversation
-    conversation_history.append({"role": "user", "content": user_input})
+        # Add the user input to the conversation
+        conversation_history.append({"role": "user", "content": user_input})
 
-    try:
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=conversation_history,
-            temperature=0.7,
-            max_tokens=1024,
-            top_p=1,
-            stream=False,
-            stop=None,
-        )
-
-        # Extract the assistant's response
-        reply = completion.choices[0].message.content.strip()
-        conversation_history.append({"role": "assistant", "content": reply})
-
-        # Print and speak the response (only in General Chatbot Mode)
-        print(f"Chatbot: {reply}")
-        voice_output(reply)
-
-        return reply
+        try:
+            requested_at = time.monotonic()
+            completion = client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=conversation_history,
+                temperature=0.7,
+                max_tokens=1024,
+                top_p=1,
+                stream=True,
+                stop=None,
+            )
 
-    except Exception as e:
-        print(f"Chatbot: Oops, something went wrong! {e}")
-        return "I'm sorry, I encountered an error while processing your request."
+            # Speak each sentence as soon as it has streamed in (only in General Chatbot Mode)
+            sentences = []
+            for sentence in stream_sentences(completion):
+                if not sentences:
+                    logger.debug("First sentence after %.1fs", time.monotonic() - requested_at)
+                sentences.append(sentence)
+                voice_output(sentence)
+            reply = " ".join(sentences)
+            conversation_history.append({"role": "assistant", "content": reply})
 
-def image_analysis_mode(image_path):
-    global chatbot_mode, last_caption
+            # Print the response
+            logger.info("Chatbot: %s", reply)
+
+            return reply
+
+        except Exception as e:
+            logger.error("Chatbot: Oops, something went wrong! %s", e)
+            return "I'm sorry, I encountered an error while processing your request."
+
+def capture_stage(image_path, frame_queue):
+    """Reads one camera's image every CAPTURE_INTERVAL seconds and hands it to that camera's caption stage.
 
-    print("Switching to Image Analysis Mode.")
+    A frame the cache matches to the one this camera forwarded last is the same scene and is not forwarded
+    again, so a still scene is captioned, reasoned about and warned of once; after a pause it is sent anew.
+    """
+    last_entry = None
+    while True:
+        if not analysis_active.is_set():
+            last_entry = None
+            analysis_active.wait()
+        started = time.monotonic()
+        try:
+            entry = frame_cache.lookup(image_path)
+            if entry is not last_entry:
+                last_entry = entry
+                offer(frame_queue, (started, entry))
+        except Exception as e:
+            logger.error("Error reading frame: %s", e)
+        time.sleep(max(0.0, CAPTURE_INTERVAL - (time.monotonic() - started)))
 
+def caption_stage(frame_queue):
+    """Captions a camera's newest frame while the previous one is still being reasoned about or spoken."""
+    global last_caption
     while True:
-        # Process the image and generate caption
-        caption = process_image(image_path)
+        captured_at, entry = frame_queue.get()
+        caption = caption_batcher.submit(entry).result()
         if caption:
             last_caption = caption  # Save the last caption
-            user_input = caption
-            print(f"You: {user_input}")
+            # Warn straight away rather than after the language model's round trip
+            risk = obstacle_risk(caption)
+            warned = analysis_active.is_set() and risk >= OBSTACLE_RISK_THRESHOLD
+            if warned:
+                logger.warning("Voice Warning: Stop! (risk %.1f)", risk)
+                voice_output(OBSTACLE_WARNING, captured_at, urgent=True)
+            offer(caption_queue, (captured_at, caption, warned))
+
+def reason_stage():
+    """Asks the language model about each new caption; obstacle warnings go to the speak stage."""
+    while True:
+        _, caption, warned = caption_queue.get()
+        if not analysis_active.is_set():
+            continue  # captioned just before the user switched modes
+        logger.info("You: %s", caption)
+        reply = image_analysis_response(caption, warned)
+        logger.info("Chatbot: %s", reply)
+
+def speak_stage():
+    """Owns the TTS engine and says queued messages one after another."""
+    tts_engine = pyttsx3.init()  # pyttsx3 engines are driven from the thread that created them
+    while True:
+        captured_at, message = speech_queue.get()
+        try:
+            if captured_at is not None:
+                age = time.monotonic() - captured_at
+                if age > WARNING_MAX_AGE:
+                    logger.info("[System] Skipping a warning from %.1fs ago.", age)
+                    continue
+                logger.info("[System] Warning spoken %.1fs after it was raised.", age)
+            tts_engine.say(message)
+            tts_engine.runAndWait()
+        except Exception as e:
+            logger.error("Error speaking: %s", e)
+        finally:
+            speech_queue.task_done()
+
+def start_pipeline(image_paths):
+    """Starts the stage threads on first use; afterwards it only resumes analysis.
+
+    `image_paths` is one camera image path or a list of them; each camera gets its own capture and caption
+    stage, and their frames are captioned in shared batches.
+    """
+    if not pipeline_threads:
+        if isinstance(image_paths, str):
+            image_paths = [image_paths]
+        # A lone camera has nothing to wait for
+        caption_batcher.window = BATCH_WINDOW if len(image_paths) > 1 else 0.0
+        stages = []
+        for camera, image_path in enumerate(image_paths):
+            frame_queue = queue.Queue(maxsize=FRAME_QUEUE_SIZE)  # (captured_at, FrameEntry)
+            stages.append((f"capture_stage-{camera}", capture_stage, (image_path, frame_queue)))
+            stages.append((f"caption_stage-{camera}", caption_stage, (frame_queue,)))
+        stages += [
+            ("caption_batcher", caption_batcher.run, ()),
+            ("reason_stage", reason_stage, ()),
+            ("speak_stage", speak_stage, ()),
+        ]
+        for name, target, args in stages:
+            thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+            thread.start()
+            pipeline_threads.append(thread)
+    analysis_active.set()
 
-            reply = image_analysis_response(user_input)
-            print(f"Chatbot: {reply}\n")
-        else:
-            print("[Error] Unable to process the image. Exiting Image Analysis Mode.")
-            return
+def image_analysis_mode(image_path):
+    global chatbot_mode
 
+    logger.info("Switching to Image Analysis Mode.")
+    start_pipeline(image_path)
+
+    while True:
+        # The pipeline keeps analysing in the background; the console only handles commands
         # Prompt the user for input to potentially switch modes
-        print("\n[System] Type 'hold' to switch to General Chatbot Mode, 'speak' to provide audio input, or press Enter to continue in Image Analysis Mode.")
+        logger.info("[System] Type 'hold' to switch to General Chatbot Mode, 'speak' to provide audio input, 'ask' to ask about what the camera sees, or press Enter to continue in Image Analysis Mode.")
         user_command = input("Command: ").strip().lower()
 
         if user_command == "hold":
-            print("Switching to General Chatbot Mode.\n")
+            logger.info("Switching to General Chatbot Mode.")
             voice_output("Switching to General Chatbot Mode.")
             chatbot_mode = "general_chatbot"
+            analysis_active.clear()
             general_chatbot_mode()
+        elif user_command == "ask":
+            question = audio_input() or input("Question: ").strip()
+            answer = ask_about_frame(question) if question else None
+            if answer:
+                logger.info("Chatbot (about the image): %s", answer)
+                voice_output(answer)
         elif user_command == "speak":
             audio_text = audio_input()
             if audio_text:
                 reply = image_analysis_response(audio_text)
-                print(f"Chatbot (from Audio): {reply}")
+                logger.info("Chatbot (from Audio): %s", reply)
         else:
-            print("Continuing in Image Analysis Mode.\n")
+            logger.info("Continuing in Image Analysis Mode.")
 
 def general_chatbot_mode():
     global chatbot_mode
 
-    print("General Chatbot Mode Activated.")
+    logger.info("General Chatbot Mode Activated.")
     voice_output("General Chatbot Mode Activated.")
 
-    print("Type 'SEE' to switch back to Image Analysis Mode or 'exit' to terminate the session.")
+    logger.info("Type 'SEE' to switch back to Image Analysis Mode or 'exit' to terminate the session.")
     while True:
-        print("Say something or type your response.")
+        logger.info("Say something or type your response.")
         user_input = audio_input() or input("You: ").strip()
         if user_input.lower() == 'exit':
-            print("Chatbot: Goodbye! Have a great day!")
+            logger.info("Chatbot: Goodbye! Have a great day!")
             voice_output("Goodbye! Have a great day!")
+            wait_for_speech()
             exit()
         elif user_input.lower() == 'see':
-            print("Switching back to Image Analysis Mode.\n")
+            logger.info("Switching back to Image Analysis Mode.")
             chatbot_mode = "image_analysis"
             image_analysis_mode("F://bmsit//trial//n.jpg")  # Update with your actual image path
             break
         else:
             reply = general_chatbot_response(user_input)
-            print(f"Chatbot: {reply}\n")
+            logger.info("Chatbot: %s", reply)
 
 def main():
     # Initial prompt with voice output
     welcome_message = "I, ODIN, call you, to see the world from my eye"
-    print(f"Chatbot: {welcome_message}")
+    logger.info("Chatbot: %s", welcome_message)
     voice_output(welcome_message)
     image_analysis_mode("F://bmsit//trial//n.jpg")  # Update with your actual image path
 
@@ -221,5 +638,6 @@ if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
-        print("\nChatbot: Session terminated by user.")
+        logger.info("Chatbot: Session terminated by user.")
         voice_output("Conversation ends here, Blessaður")
+        wait_for_speech()
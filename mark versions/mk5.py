@@ -4,6 +4,11 @@ from PIL import Image
 import torchvision.transforms as transforms
 import matplotlib.pyplot as plt
 import numpy as np
+import logging
+
+# Configure logging for the console session
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
 
 # Define the model architecture based on the saved model
 class DepthProModel(nn.Module):
@@ -40,12 +45,23 @@ model = DepthProModel()
 model_path = "F:/bmsit/trial/checkpoints/depth_pro.pt"
 try:
     model.load_state_dict(torch.load(model_path, map_location=torch.device('cpu')), strict=False)
-    print("Model weights loaded successfully.")
+    logger.info("Model weights loaded successfully.")
 except Exception as e:
-    print(f"Error loading model weights: {e}")
+    logger.error("Error loading model weights: %s", e)
 
 model.eval()
 
+# Obstacle check on the depth map: the path ahead is the centre third of the frame, below the top third.
+# Depth Pro predicts metres; a warning goes out when enough of the path is nearer than NEAR_DEPTH_METERS.
+NEAR_DEPTH_METERS = 1.5
+DEPTH_RISK_FRACTION = 0.15
+
+def depth_obstacle_risk(depth):
+    """Fraction of the path ahead nearer than NEAR_DEPTH_METERS, from 0 to 1; a few numpy operations per frame."""
+    height, width = depth.shape
+    path = depth[height // 3:, width // 3:2 * width // 3]
+    return float(np.mean(path < NEAR_DEPTH_METERS))
+
 # Define a preprocessing transform
 transform = transforms.Compose([
     transforms.Resize((256, 256)),
@@ -63,6 +79,11 @@ with torch.no_grad():
     depth = prediction["depth"].squeeze().numpy()  # Remove batch and channel dimensions
     focallength_px = prediction["focallength_px"].item()  # Extract scalar
 
+# Warn before anything else is drawn or asked
+risk = depth_obstacle_risk(depth)
+if risk >= DEPTH_RISK_FRACTION:
+    logger.warning("Voice Warning: Stop! %.0f%% of the path ahead is within %.1f m.", risk * 100, NEAR_DEPTH_METERS)
+
 # Display input image and depth map
 plt.figure(figsize=(12, 6))
 plt.subplot(1, 2, 1)
@@ -72,7 +93,7 @@ plt.axis("off")
 
 plt.subplot(1, 2, 2)
 plt.imshow(depth, cmap="viridis")
-plt.title(f"Depth Map\nFocal Length: {focallength_px:.2f}px")
+plt.title(f"Depth Map\nFocal Length: {focallength_px:.2f}px, Obstacle Risk: {risk:.0%}")
 plt.axis("off")
 
 plt.show()
@@ -0,0 +1,35 @@
+// Converts microphone input to 16-bit little-endian PCM on the audio thread and posts it to the page
+// in frames of `frameMs` milliseconds, each frame's buffer transferred rather than copied.
+const PCM_CAPTURE_FRAME_MS = 40;
+
+class PCMCaptureProcessor extends AudioWorkletProcessor {
+    constructor(options) {
+        super();
+        const processorOptions = (options && options.processorOptions) || {};
+        const frameMs = processorOptions.frameMs || PCM_CAPTURE_FRAME_MS;
+        this.frameSamples = Math.max(128, Math.round(sampleRate * frameMs / 1000));
+        this.frame = new Int16Array(this.frameSamples);
+        this.filled = 0;
+    }
+
+    process(inputs, outputs, parameters) {
+        const input = inputs[0];
+        if (!input || input.length === 0) {
+            return true;  // no source connected yet
+        }
+
+        const channelData = input[0];
+        for (let i = 0; i < channelData.length; i++) {
+            const sample = Math.max(-1, Math.min(1, channelData[i]));
+            this.frame[this.filled++] = sample < 0 ? sample * 0x8000 : sample * 0x7fff;
+            if (this.filled === this.frameSamples) {
+                this.port.postMessage(this.frame.buffer, [this.frame.buffer]);
+                this.frame = new Int16Array(this.frameSamples);
+                this.filled = 0;
+            }
+        }
+        return true;
+    }
+}
+
+registerProcessor('pcm-capture-processor', PCMCaptureProcessor);
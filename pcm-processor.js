@@ -1,30 +1,100 @@
+// Plays model audio posted from the page as Float32Array chunks.
+// Samples live in a ring, so queueing and playing do not allocate on the audio thread; the ring only grows,
+// by doubling, when a reply gets further ahead of playback than it can hold.
+const PCM_BUFFER_SECONDS = 30;
+const PCM_MAX_BUFFER_SECONDS = 600;
+
 class PCMProcessor extends AudioWorkletProcessor {
-    constructor() {
+    constructor(options) {
         super();
-        this.buffer = new Float32Array();
+        const processorOptions = (options && options.processorOptions) || {};
+        const bufferSeconds = processorOptions.bufferSeconds || PCM_BUFFER_SECONDS;
+        // "grow" keeps every sample up to maxBufferSeconds queued; "drop-oldest" keeps playback close to live;
+        // "drop-newest" never skips what is already queued. Past the limit "grow" drops the newest samples.
+        this.overflow = processorOptions.overflow || "grow";
+        this.maxSamples = Math.ceil(sampleRate * (processorOptions.maxBufferSeconds || PCM_MAX_BUFFER_SECONDS));
+        this.buffer = new Float32Array(Math.ceil(sampleRate * bufferSeconds));
+        this.readIndex = 0;
+        this.writeIndex = 0;
+        this.available = 0;
+        this.droppedSamples = 0;
 
         // Correct way to handle messages in AudioWorklet
         this.port.onmessage = (e) => {
-            const newData = e.data;
-            const newBuffer = new Float32Array(this.buffer.length + newData.length);
-            newBuffer.set(this.buffer);
-            newBuffer.set(newData, this.buffer.length);
-            this.buffer = newBuffer;
+            this.enqueue(e.data);
         };
     }
 
+    grow(needed) {
+        // Unplayed samples move to the start of a larger ring
+        const capacity = Math.min(this.maxSamples, Math.max(this.buffer.length * 2, needed));
+        if (capacity <= this.buffer.length) {
+            return;
+        }
+        const grown = new Float32Array(capacity);
+        const firstPart = Math.min(this.available, this.buffer.length - this.readIndex);
+        grown.set(this.buffer.subarray(this.readIndex, this.readIndex + firstPart));
+        grown.set(this.buffer.subarray(0, this.available - firstPart), firstPart);
+        this.buffer = grown;
+        this.readIndex = 0;
+        this.writeIndex = this.available;
+    }
+
+    enqueue(samples) {
+        let incoming = samples;
+        if (this.overflow === "grow" && this.available + incoming.length > this.buffer.length) {
+            this.grow(this.available + incoming.length);
+        }
+        const capacity = this.buffer.length;
+        const dropNewest = this.overflow !== "drop-oldest";
+        const droppedBefore = this.droppedSamples;
+        if (incoming.length > capacity) {
+            // A chunk longer than the whole ring can only be kept in part
+            this.droppedSamples += incoming.length - capacity;
+            incoming = dropNewest
+                ? incoming.subarray(0, capacity)
+                : incoming.subarray(incoming.length - capacity);
+        }
+
+        const free = capacity - this.available;
+        if (incoming.length > free) {
+            const excess = incoming.length - free;
+            this.droppedSamples += excess;
+            if (dropNewest) {
+                incoming = incoming.subarray(0, free);
+            } else {
+                this.readIndex = (this.readIndex + excess) % capacity;
+                this.available -= excess;
+            }
+        }
+        if (this.droppedSamples !== droppedBefore) {
+            // Lets the page show that model speech was lost
+            this.port.postMessage({ droppedSamples: this.droppedSamples, droppedSeconds: this.droppedSamples / sampleRate });
+        }
+
+        const firstPart = Math.min(incoming.length, capacity - this.writeIndex);
+        this.buffer.set(incoming.subarray(0, firstPart), this.writeIndex);
+        this.buffer.set(incoming.subarray(firstPart), 0);
+        this.writeIndex = (this.writeIndex + incoming.length) % capacity;
+        this.available += incoming.length;
+    }
+
     process(inputs, outputs, parameters) {
         const output = outputs[0];
         const channelData = output[0];
+        const capacity = this.buffer.length;
 
-        if (this.buffer.length >= channelData.length) {
-            channelData.set(this.buffer.slice(0, channelData.length));
-            this.buffer = this.buffer.slice(channelData.length);
-            return true;
-        }
+        // Play whatever is queued, even less than a full quantum, and pad the rest with silence
+        const count = Math.min(this.available, channelData.length);
+        const firstPart = Math.min(count, capacity - this.readIndex);
+        channelData.set(this.buffer.subarray(this.readIndex, this.readIndex + firstPart));
+        channelData.set(this.buffer.subarray(0, count - firstPart), firstPart);
+        channelData.fill(0, count);
+        this.readIndex = (this.readIndex + count) % capacity;
+        this.available -= count;
 
         return true;
     }
 }
 
-registerProcessor('pcm-processor', PCMProcessor);
\ No newline at end of file
+registerProcessor('pcm-processor', PCMProcessor);
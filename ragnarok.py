@@ -0,0 +1,321 @@
+## Record-and-replay harness and load generator for the Bifrost relay in main.py
+##   python ragnarok.py record --out yggdrasil_trace.jsonl        (real API; talk to it through index.html)
+##   python ragnarok.py load --clients 200 --duration 30 [--trace yggdrasil_trace.jsonl] [--max-p99 1.5]
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import io
+import json
+import math
+import os
+import time
+import types
+
+import numpy as np
+import websockets
+from PIL import Image
+
+# genai.Client refuses to start without a key; replays never reach the real API, recordings need a real one
+os.environ.setdefault("GOOGLE_API_KEY", "ragnarok-replay")
+import main
+
+RAGNAROK_PORT = 6107
+# Synthetic turn used when no recorded trace is given: the model starts speaking after a pause and
+# streams 24 kHz PCM chunks at roughly real time
+RAGNAROK_FIRST_AUDIO_AFTER = 0.4
+RAGNAROK_AUDIO_CHUNKS = 12
+RAGNAROK_AUDIO_CHUNK_SECONDS = 0.2
+RAGNAROK_HANDSHAKE_SECONDS = 0.3
+
+def synthetic_trace():
+    """One spoken turn with no tool call, shaped like a short Yggdrasil audio reply."""
+    chunk = np.zeros(int(24000 * RAGNAROK_AUDIO_CHUNK_SECONDS), dtype="<i2").tobytes()
+    events = [
+        {"after": RAGNAROK_FIRST_AUDIO_AFTER + index * RAGNAROK_AUDIO_CHUNK_SECONDS,
+         "audio": base64.b64encode(chunk).decode("ascii"), "mime_type": "audio/pcm;rate=24000"}
+        for index in range(RAGNAROK_AUDIO_CHUNKS)
+    ]
+    events.append({"after": events[-1]["after"] + 0.05, "turn_complete": True})
+    return [events]
+
+def load_trace(path):
+    """Reads a trace written by `record`: one JSON object per turn, each holding its timed events."""
+    with open(path, encoding="utf-8") as trace_file:
+        return [json.loads(line)["events"] for line in trace_file if line.strip()]
+
+def build_response(event):
+    """Turns a trace event into an object shaped like a google-genai LiveServerMessage."""
+    if "tool_call" in event:
+        function_calls = [types.SimpleNamespace(**call) for call in event["tool_call"]]
+        return types.SimpleNamespace(server_content=None, tool_call=types.SimpleNamespace(function_calls=function_calls))
+    parts = []
+    if "text" in event:
+        parts.append(types.SimpleNamespace(text=event["text"], inline_data=None))
+    if "audio" in event:
+        inline_data = types.SimpleNamespace(data=base64.b64decode(event["audio"]), mime_type=event["mime_type"])
+        parts.append(types.SimpleNamespace(text=None, inline_data=inline_data))
+    server_content = types.SimpleNamespace(
+        model_turn=types.SimpleNamespace(parts=parts) if parts else None,
+        turn_complete=bool(event.get("turn_complete")),
+    )
+    return types.SimpleNamespace(server_content=server_content, tool_call=None)
+
+class ReplaySession:
+    """Stands in for a live session: client input arriving after a turn has ended triggers the next recorded turn."""
+
+    def __init__(self, trace):
+        self.trace = trace
+        self.turn_index = 0
+        self.input_arrived = asyncio.Event()
+        self.tool_answered = asyncio.Event()
+
+    async def send(self, message):
+        if isinstance(message, list):
+            self.tool_answered.set()
+        else:
+            self.input_arrived.set()
+
+    async def receive(self):
+        await self.input_arrived.wait()
+        self.input_arrived.clear()
+        events = self.trace[self.turn_index % len(self.trace)]
+        self.turn_index += 1
+        turn_started = time.monotonic()
+        for event in events:
+            delay = turn_started + event["after"] - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield build_response(event)
+            if "tool_call" in event:
+                self.tool_answered.clear()
+                await self.tool_answered.wait()
+        # Input sent while the model was talking belongs to this turn, not the next
+        self.input_arrived.clear()
+
+class ReplayValkyrieClient:
+    """Offers `.aio.live.connect` like genai.Client, handing out ReplaySessions after a simulated handshake."""
+
+    def __init__(self, trace, handshake_seconds=RAGNAROK_HANDSHAKE_SECONDS):
+        self.trace = trace
+        self.handshake_seconds = handshake_seconds
+        self.aio = types.SimpleNamespace(live=self)
+
+    @contextlib.asynccontextmanager
+    async def connect(self, model, config):
+        await asyncio.sleep(self.handshake_seconds)
+        yield ReplaySession(self.trace)
+
+class RecordingSession:
+    """Wraps a real live session and appends every turn it receives to a trace file."""
+
+    def __init__(self, session, trace_file):
+        self.session = session
+        self.trace_file = trace_file
+        self.last_input_at = time.monotonic()
+        self.turn_started = None
+        self.events = []
+
+    async def send(self, message):
+        self.last_input_at = time.monotonic()
+        await self.session.send(message)
+
+    async def receive(self):
+        async for response in self.session.receive():
+            if self.turn_started is None:
+                self.turn_started = self.last_input_at
+            self.record(response)
+            yield response
+
+    def record(self, response):
+        after = round(time.monotonic() - self.turn_started, 4)
+        if response.tool_call is not None:
+            calls = [{"name": call.name, "args": dict(call.args or {}), "id": call.id} for call in response.tool_call.function_calls]
+            self.events.append({"after": after, "tool_call": calls})
+            return
+        if response.server_content is None:
+            return
+        if response.server_content.model_turn:
+            for part in response.server_content.model_turn.parts:
+                if part.text is not None:
+                    self.events.append({"after": after, "text": part.text})
+                elif part.inline_data is not None:
+                    self.events.append({"after": after, "audio": base64.b64encode(part.inline_data.data).decode("ascii"),
+                                        "mime_type": part.inline_data.mime_type})
+        if response.server_content.turn_complete:
+            self.events.append({"after": after, "turn_complete": True})
+            self.trace_file.write(json.dumps({"events": self.events}) + "\n")
+            self.trace_file.flush()
+            self.events = []
+            self.turn_started = None
+
+class RecordingValkyrieClient:
+    """Wraps genai.Client so every live session it opens is recorded."""
+
+    def __init__(self, client, trace_file):
+        self.client = client
+        self.trace_file = trace_file
+        self.aio = types.SimpleNamespace(live=self)
+
+    @contextlib.asynccontextmanager
+    async def connect(self, model, config):
+        async with self.client.aio.live.connect(model=model, config=config) as session:
+            yield RecordingSession(session, self.trace_file)
+
+def sample_media():
+    """A voiced 16 kHz PCM chunk and a small JPEG, the same kinds of media index.html sends."""
+    seconds = np.arange(int(main.GJALLARHORN_SAMPLE_RATE * 0.5)) / main.GJALLARHORN_SAMPLE_RATE
+    pcm = (6000 * np.sin(2 * math.pi * 220 * seconds)).astype("<i2").tobytes()
+    jpeg = io.BytesIO()
+    Image.fromarray(np.random.default_rng(7).integers(0, 255, (240, 320, 3), dtype=np.uint8)).save(jpeg, "JPEG")
+    return pcm, jpeg.getvalue()
+
+class LoadStats:
+    def __init__(self):
+        self.sent = 0
+        self.sent_bytes = 0
+        self.received = 0
+        self.received_bytes = 0
+        self.latencies = []
+        self.failures = 0
+
+    def percentile(self, fraction):
+        if not self.latencies:
+            return float("nan")
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def heimdall_client(url, stats, deadline, interval, binary, pcm, jpeg):
+    """One fake browser: sends setup, then audio and a frame every `interval` seconds until `deadline`.
+
+    Latency is sampled once per turn: from the first chunk sent after the previous turn completed (or after
+    setup) to the first audio that comes back.
+    """
+    awaiting_since = None
+    armed = True  # the next chunk sent starts a sample
+
+    async def listen(connection):
+        nonlocal awaiting_since, armed
+        # A close the relay chose (a 1013 rejection, say) surfaces as a failed send in the client below
+        with contextlib.suppress(websockets.exceptions.ConnectionClosed):
+            async for message in connection:
+                stats.received += 1
+                stats.received_bytes += len(message)
+                if isinstance(message, bytes) or '"audio"' in message[:16]:
+                    if awaiting_since is not None:
+                        stats.latencies.append(time.monotonic() - awaiting_since)
+                        awaiting_since = None
+                elif '"turn_complete"' in message:
+                    awaiting_since = None
+                    armed = True
+
+    try:
+        async with websockets.connect(url, max_size=None) as connection:
+            setup = {"setup": {"generation_config": {"response_modalities": ["AUDIO"]}}, "bifrost": {"binary": binary}}
+            await connection.send(json.dumps(setup))
+            listener = asyncio.create_task(listen(connection))
+            if binary:
+                messages = [main.forge_bifrost_frame("audio/pcm", pcm), main.forge_bifrost_frame("image/jpeg", jpeg)]
+            else:
+                messages = [json.dumps({"realtime_input": {"media_chunks": [
+                    {"mime_type": "audio/pcm", "data": base64.b64encode(pcm).decode("ascii")},
+                    {"mime_type": "image/jpeg", "data": base64.b64encode(jpeg).decode("ascii")},
+                ]}})]
+            while time.monotonic() < deadline:
+                for message in messages:
+                    await connection.send(message)
+                    stats.sent += 1
+                    stats.sent_bytes += len(message)
+                if armed:
+                    awaiting_since = time.monotonic()
+                    armed = False
+                await asyncio.sleep(interval)
+            listener.cancel()
+    except Exception as e:
+        stats.failures += 1
+        main.logger.warning("Load client failed: %s", e)
+
+async def run_load(args):
+    trace = load_trace(args.trace) if args.trace else synthetic_trace()
+    url = args.url
+    bifrost_server = None
+    if url is None:
+        main.yggdrasil_pool.client = ReplayValkyrieClient(trace)
+        # Admission control would turn most of a large crowd away; the relay started here takes them all
+        # unless --max-sessions asks for a production-like cap
+        main.bifrost_admission.max_sessions = args.max_sessions or args.clients
+        bifrost_server = await websockets.serve(main.bifrost_handler, "localhost", RAGNAROK_PORT, max_size=None)
+        url = f"ws://localhost:{RAGNAROK_PORT}"
+
+    pcm, jpeg = sample_media()
+    stats = LoadStats()
+    started = time.monotonic()
+    deadline = started + args.duration
+    clients = []
+    for _ in range(args.clients):
+        clients.append(asyncio.create_task(heimdall_client(url, stats, deadline, args.interval, args.binary, pcm, jpeg)))
+        await asyncio.sleep(args.ramp / max(1, args.clients))
+    await asyncio.gather(*clients)
+    elapsed = time.monotonic() - started
+
+    if bifrost_server is not None:
+        bifrost_server.close()
+        await bifrost_server.wait_closed()
+
+    report = {
+        "clients": args.clients,
+        "binary": args.binary,
+        "seconds": round(elapsed, 2),
+        "failures": stats.failures,
+        "sent_per_second": round(stats.sent / elapsed, 1),
+        "sent_bytes_per_second": round(stats.sent_bytes / elapsed),
+        "received_per_second": round(stats.received / elapsed, 1),
+        "received_bytes_per_second": round(stats.received_bytes / elapsed),
+        "latency_samples": len(stats.latencies),
+        "latency_p50": round(stats.percentile(0.50), 4),
+        "latency_p95": round(stats.percentile(0.95), 4),
+        "latency_p99": round(stats.percentile(0.99), 4),
+    }
+    return report
+
+def run_record(args):
+    log_listener = main.setup_bifrost_logging()
+    with open(args.out, "a", encoding="utf-8") as trace_file:
+        main.yggdrasil_pool.client = RecordingValkyrieClient(main.valkyrie_client, trace_file)
+        try:
+            asyncio.run(main.main())
+        finally:
+            log_listener.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record Yggdrasil traces and replay them against the Bifrost relay under load")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="run Bifrost against the real API and append each turn to a trace")
+    record_parser.add_argument("--out", default="yggdrasil_trace.jsonl")
+
+    load_parser = commands.add_parser("load", help="drive many fake browsers through Bifrost and report throughput and latency")
+    load_parser.add_argument("--clients", type=int, default=100)
+    load_parser.add_argument("--duration", type=float, default=20.0, help="seconds each client keeps sending")
+    load_parser.add_argument("--interval", type=float, default=0.5, help="seconds between a client's media sends")
+    load_parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which clients connect")
+    load_parser.add_argument("--binary", action="store_true", help="send binary media frames instead of base64 JSON")
+    load_parser.add_argument("--trace", help="trace from `record`; a synthetic reply is replayed if omitted")
+    load_parser.add_argument("--url", help="an already running Bifrost; by default one is started here against the replay")
+    load_parser.add_argument("--max-sessions", type=int,
+                             help="session cap of the Bifrost started here; by default every client is admitted")
+    load_parser.add_argument("--json", help="also write the report to this file")
+    load_parser.add_argument("--max-p99", type=float, help="exit non-zero if p99 latency exceeds this many seconds")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        run_record(args)
+    else:
+        report = asyncio.run(run_load(args))
+        print(json.dumps(report, indent=2))
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as report_file:
+                json.dump(report, report_file, indent=2)
+        if args.max_p99 is not None and not report["latency_p99"] <= args.max_p99:
+            raise SystemExit(f"p99 latency {report['latency_p99']}s exceeds {args.max_p99}s")
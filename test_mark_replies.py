@@ -0,0 +1,40 @@
+import ast
+import os
+import re
+
+import pytest
+
+MARK_VERSIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mark versions")
+REPLY_NAMES = {"OBSTACLE_REPLY", "CLEAR_REPLY", "DIRECTION_WORDS", "reply_is_clear", "reply_reports_obstacle"}
+
+def reply_checks(script):
+    """The reply patterns and checks of a mark version, without importing it (that loads the models)."""
+    with open(os.path.join(MARK_VERSIONS, script), encoding="utf-8") as source:
+        tree = ast.parse(source.read())
+    nodes = [node for node in tree.body
+             if isinstance(node, ast.FunctionDef) and node.name in REPLY_NAMES
+             or isinstance(node, ast.Assign) and any(getattr(target, "id", None) in REPLY_NAMES for target in node.targets)]
+    namespace = {"re": re}
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), script, "exec"), namespace)
+    return namespace
+
+# (reply sentence, whether it reports an obstacle)
+REPLIES = [
+    ("Yes, there are obstacles.", True),
+    ("Yes, there are obstacles, a chair is in front of you.", True),
+    ("There is an obstacle ahead, it is safe to move to the left.", True),
+    ("There is an obstacle in your path; step right to get around it.", True),
+    ("Yes, there are obstacles, it is safe to go around them.", True),
+    ("Yes, it is safe to move forward.", False),
+    ("No, it is safe to move forward.", False),
+    ("There are no obstacles.", False),
+    ("I see no obstacles in your path.", False),
+    ("The path looks clear with no obstacles ahead.", False),
+    ("I don't see any obstacles in your path, go right ahead.", False),
+    ("The hallway is free of obstacles ahead.", False),
+]
+
+@pytest.mark.parametrize("script", ["mk4.py", "mk401.py"])
+@pytest.mark.parametrize("sentence, reports_obstacle", REPLIES)
+def test_reply_reports_obstacle(script, sentence, reports_obstacle):
+    assert reply_checks(script)["reply_reports_obstacle"](sentence) is reports_obstacle
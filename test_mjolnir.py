@@ -0,0 +1,70 @@
+import asyncio
+import os
+import types
+
+# genai.Client refuses to start without a key; nothing here reaches the real API
+os.environ.setdefault("GOOGLE_API_KEY", "test-mjolnir")
+import main
+
+def executor_with_counter():
+    """An executor over a copy of wield_mjolnir whose handler records every set of arguments it runs with.
+
+    It gets a ledger of its own, so tests do not see each other's device state.
+    """
+    applied = []
+
+    def wield_mjolnir(luminosity, aura_hue):
+        applied.append((luminosity, aura_hue))
+        return {"luminosity": luminosity, "auraHue": aura_hue}
+
+    tool = main.MjolnirTool(wield_mjolnir, main.mjolnir_tools["wield_mjolnir"].declaration,
+                            main.mjolnir_tools["wield_mjolnir"].coercers, cache_ttl=30.0)
+    return main.MjolnirExecutor({"wield_mjolnir": tool}, ledger=main.MjolnirLedger()), applied
+
+def call(luminosity, aura_hue):
+    return types.SimpleNamespace(name="wield_mjolnir", args={"luminosity": luminosity, "aura_hue": aura_hue}, id="test")
+
+def test_repeated_call_is_cached():
+    executor, applied = executor_with_counter()
+
+    async def run():
+        await executor.execute([call(50, "warm")])
+        return await executor.execute([call(50, "warm")])
+
+    responses = asyncio.run(run())
+    assert applied == [(50, "warm")]
+    assert responses[0]["response"]["result"] == {"luminosity": 50, "auraHue": "warm"}
+
+def test_returning_to_earlier_arguments_runs_again():
+    executor, applied = executor_with_counter()
+
+    async def run():
+        for luminosity, aura_hue in ((50, "warm"), (80, "cool"), (50, "warm")):
+            await executor.execute([call(luminosity, aura_hue)])
+
+    asyncio.run(run())
+    assert applied == [(50, "warm"), (80, "cool"), (50, "warm")]
+
+def test_returning_to_earlier_arguments_across_sessions_runs_again():
+    first, applied = executor_with_counter()
+    second = main.MjolnirExecutor(first.tools, ledger=first.ledger)
+
+    async def run():
+        await first.execute([call(50, "warm")])
+        await second.execute([call(80, "cool")])
+        return await first.execute([call(50, "warm")])
+
+    responses = asyncio.run(run())
+    assert applied == [(50, "warm"), (80, "cool"), (50, "warm")]
+    assert responses[0]["response"]["result"] == {"luminosity": 50, "auraHue": "warm"}
+
+def test_sessions_share_the_applied_state():
+    first, applied = executor_with_counter()
+    second = main.MjolnirExecutor(first.tools, ledger=first.ledger)
+
+    async def run():
+        await first.execute([call(50, "warm")])
+        await second.execute([call(50, "warm")])
+
+    asyncio.run(run())
+    assert applied == [(50, "warm")]